@@ -177,7 +177,7 @@ class Finisher(Poller):
         return None
 
     def process_sync_processing(self, event):
-        self.number_workers += 1
+        self.add_worker()
         pro_ret = ReturnCode.Ok.value
         try:
             if event:
@@ -210,7 +210,7 @@ class Finisher(Poller):
             self.logger.error(ex)
             self.logger.error(traceback.format_exc())
             pro_ret = ReturnCode.Failed.value
-        self.number_workers -= 1
+        self.remove_worker()
         return pro_ret
 
     def handle_terminated_processing(self, processing, log_prefix=""):
@@ -270,7 +270,7 @@ class Finisher(Poller):
         return None
 
     def process_terminated_processing(self, event):
-        self.number_workers += 1
+        self.add_worker()
         pro_ret = ReturnCode.Ok.value
         try:
             if event:
@@ -314,7 +314,7 @@ class Finisher(Poller):
             self.logger.error(ex)
             self.logger.error(traceback.format_exc())
             pro_ret = ReturnCode.Failed.value
-        self.number_workers -= 1
+        self.remove_worker()
         return pro_ret
 
     def handle_abort_processing(self, processing, log_prefix=""):
@@ -347,7 +347,7 @@ class Finisher(Poller):
         return None
 
     def process_abort_processing(self, event):
-        self.number_workers += 1
+        self.add_worker()
         pro_ret = ReturnCode.Ok.value
         try:
             if event:
@@ -388,7 +388,7 @@ class Finisher(Poller):
             self.logger.error(ex)
             self.logger.error(traceback.format_exc())
             pro_ret = ReturnCode.Failed.value
-        self.number_workers -= 1
+        self.remove_worker()
         return pro_ret
 
     def handle_resume_processing(self, processing, log_prefix=""):
@@ -420,7 +420,7 @@ class Finisher(Poller):
         return None
 
     def process_resume_processing(self, event):
-        self.number_workers += 1
+        self.add_worker()
         pro_ret = ReturnCode.Ok.value
         try:
             if event:
@@ -457,7 +457,7 @@ class Finisher(Poller):
             self.logger.error(ex)
             self.logger.error(traceback.format_exc())
             pro_ret = ReturnCode.Failed.value
-        self.number_workers -= 1
+        self.remove_worker()
         return pro_ret
 
     def init_event_function_map(self):
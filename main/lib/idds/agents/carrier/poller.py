@@ -293,12 +293,10 @@ class Poller(BaseAgent):
 
                 parameters = {'status': processing['update_processing']['parameters']['status'],
                               'locking': ProcessingLocking.Idle}
-                if 'new_retries' in processing['update_processing']['parameters']:
-                    parameters['new_retries'] = processing['update_processing']['parameters']['new_retries']
-                if 'update_retries' in processing['update_processing']['parameters']:
-                    parameters['update_retries'] = processing['update_processing']['parameters']['update_retries']
-                if 'errors' in processing['update_processing']['parameters']:
-                    parameters['errors'] = processing['update_processing']['parameters']['errors']
+                update_parameters = processing['update_processing']['parameters']
+                for key in ('new_retries', 'update_retries', 'errors'):
+                    if key in update_parameters:
+                        parameters[key] = update_parameters[key]
 
                 self.logger.warn(log_prefix + "update_processing exception result: %s" % (parameters))
                 core_processings.update_processing(processing_id=processing_id, parameters=parameters)
@@ -529,7 +527,7 @@ class Poller(BaseAgent):
         return ret
 
     def process_update_processing(self, event):
-        self.number_workers += 1
+        self.add_worker()
         pro_ret = ReturnCode.Ok.value
         try:
             if event:
@@ -580,7 +578,7 @@ class Poller(BaseAgent):
             self.logger.error(ex)
             self.logger.error(traceback.format_exc())
             pro_ret = ReturnCode.Failed.value
-        self.number_workers -= 1
+        self.remove_worker()
         return pro_ret
 
     def clean_locks(self):
@@ -254,7 +254,7 @@ class Submitter(Poller):
         return ret
 
     def process_new_processing(self, event):
-        self.number_workers += 1
+        self.add_worker()
         try:
             if event:
                 # pr_status = [ProcessingStatus.New]
@@ -286,7 +286,7 @@ class Submitter(Poller):
         except Exception as ex:
             self.logger.error(ex)
             self.logger.error(traceback.format_exc())
-        self.number_workers -= 1
+        self.remove_worker()
 
     def init_event_function_map(self):
         self.event_func_map = {
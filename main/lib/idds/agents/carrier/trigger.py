@@ -257,9 +257,9 @@ class Trigger(Poller):
         return pro_ret
 
     def process_trigger_processing(self, event):
-        self.number_workers += 1
+        self.add_worker()
         ret = self.process_trigger_processing_real(event)
-        self.number_workers -= 1
+        self.remove_worker()
         return ret
 
     def process_msg_trigger_processing(self, event):
@@ -9,6 +9,7 @@
 # - Wen Guan, <wen.guan@cern.ch>, 2022 - 2023
 
 import concurrent
+import itertools
 import json
 import logging
 import time
@@ -36,6 +37,35 @@ from idds.agents.common.cache.redis import get_redis_cache
 setup_logging(__name__)
 
 
+AVAILABLE_CONTENT_STATUS = frozenset([ContentStatus.Available, ContentStatus.FakeAvailable])
+TERMINATED_CONTENT_STATUS = frozenset([ContentStatus.Available, ContentStatus.FakeAvailable,
+                                       ContentStatus.FinalFailed, ContentStatus.Missing])
+TERMINATED_CONTENT_STATUS_WITH_FAILED = TERMINATED_CONTENT_STATUS | frozenset([ContentStatus.Failed])
+
+# processed status, both as enum members and as values (contents from the database may carry either)
+PROCESSED_CONTENT_STATUS = frozenset([ContentStatus.Available, ContentStatus.Mapped, ContentStatus.FakeAvailable,
+                                      ContentStatus.Available.value, ContentStatus.Mapped.value, ContentStatus.FakeAvailable.value])
+FAILED_CONTENT_STATUS = frozenset([ContentStatus.Failed, ContentStatus.FinalFailed])
+MISSING_CONTENT_STATUS = frozenset([ContentStatus.Lost, ContentStatus.Deleted, ContentStatus.Missing])
+
+# collection file counter for a content status. Other status are counted as 'processing_files'.
+FILE_COUNTER_BY_CONTENT_STATUS = {ContentStatus.Available: 'processed_files', ContentStatus.Available.value: 'processed_files',
+                                  ContentStatus.Mapped: 'processed_files', ContentStatus.Mapped.value: 'processed_files',
+                                  ContentStatus.FakeAvailable: 'processed_files', ContentStatus.FakeAvailable.value: 'processed_files',
+                                  ContentStatus.New: 'new_files',
+                                  ContentStatus.Failed: 'failed_files', ContentStatus.FinalFailed: 'failed_files',
+                                  ContentStatus.Lost: 'missing_files', ContentStatus.Deleted: 'missing_files',
+                                  ContentStatus.Missing: 'missing_files'}
+
+# message types keyed by the TransformType member, falling back to the unknown message types
+MESSAGE_TYPES_BY_WORK_TYPE = {item['transform_type']: item for item in TransformType2MessageTypeMap.values()}
+UNKNOWN_MESSAGE_TYPES = TransformType2MessageTypeMap['0']
+
+# content status name published in file messages. FakeAvailable is reported as Available.
+FILE_MESSAGE_STATUS_NAMES = {status: status.name for status in ContentStatus}
+FILE_MESSAGE_STATUS_NAMES[ContentStatus.FakeAvailable] = ContentStatus.Available.name
+
+
 def get_logger(logger=None):
     if logger:
         return logger
@@ -45,6 +75,8 @@ def get_logger(logger=None):
 
 def get_new_content(request_id, transform_id, workload_id, map_id, input_content, content_relation_type=ContentRelationType.Input,
                     es_name=None, sub_map_id=None, order_id=None):
+    status = input_content.get('status')
+    substatus = input_content.get('substatus')
     content = {'transform_id': transform_id,
                'coll_id': input_content['coll_id'],
                'request_id': request_id,
@@ -52,20 +84,16 @@ def get_new_content(request_id, transform_id, workload_id, map_id, input_content
                'map_id': map_id,
                'scope': input_content['scope'],
                'name': input_content['name'],
-               'min_id': input_content['min_id'] if 'min_id' in input_content else 0,
-               'max_id': input_content['max_id'] if 'max_id' in input_content else 0,
-               'status': input_content['status'] if 'status' in input_content and input_content['status'] is not None else ContentStatus.New,
-               'substatus': input_content['substatus'] if 'substatus' in input_content and input_content['substatus'] is not None else ContentStatus.New,
-               'path': input_content['path'] if 'path' in input_content else None,
-               'content_type': input_content['content_type'] if 'content_type' in input_content else ContentType.File,
+               'min_id': input_content.get('min_id') or 0,
+               'max_id': input_content.get('max_id') or 0,
+               'status': status if status is not None else ContentStatus.New,
+               'substatus': substatus if substatus is not None else ContentStatus.New,
+               'path': input_content.get('path'),
+               'content_type': input_content.get('content_type', ContentType.File),
                'content_relation_type': content_relation_type,
                'bytes': input_content['bytes'],
                'adler32': input_content['adler32'],
                'content_metadata': input_content['content_metadata']}
-    if content['min_id'] is None:
-        content['min_id'] = 0
-    if content['max_id'] is None:
-        content['max_id'] = 0
     if 'sub_map_id' in input_content:
         content['sub_map_id'] = input_content['sub_map_id']
     if 'dep_sub_map_id' in input_content:
@@ -98,85 +126,59 @@ def is_process_finished(processing_status):
 
 
 def is_all_contents_available(contents):
-    for content in contents:
-        if type(content) is dict:
-            if content['substatus'] not in [ContentStatus.Available, ContentStatus.FakeAvailable]:
-                return False
-        else:
-            # list of content_id, status,
-            if content[1] not in [ContentStatus.Available, ContentStatus.FakeAvailable]:
-                return False
-    return True
+    # a content is either a dict or a list of content_id, status
+    return all((content['substatus'] if type(content) is dict else content[1]) in AVAILABLE_CONTENT_STATUS for content in contents)
 
 
 def is_all_contents_terminated(contents, terminated=False):
-    terminated_status = [ContentStatus.Available, ContentStatus.FakeAvailable,
-                         ContentStatus.FinalFailed, ContentStatus.Missing]
-    if terminated:
-        terminated_status = [ContentStatus.Available, ContentStatus.FakeAvailable, ContentStatus.Failed,
-                             ContentStatus.FinalFailed, ContentStatus.Missing]
-
-    for content in contents:
-        if type(content) is dict:
-            if content['substatus'] not in terminated_status:
-                return False
-        else:
-            if content[1] not in terminated_status:
-                return False
-    return True
+    terminated_status = TERMINATED_CONTENT_STATUS_WITH_FAILED if terminated else TERMINATED_CONTENT_STATUS
+    return all((content['substatus'] if type(content) is dict else content[1]) in terminated_status for content in contents)
 
 
 def is_input_dependency_terminated(input_dependency):
     if type(input_dependency) is dict:
-        if input_dependency['substatus'] in [ContentStatus.Available, ContentStatus.FakeAvailable,
-                                             ContentStatus.FinalFailed, ContentStatus.Missing]:
-            return True
-    else:
-        if input_dependency[1] in [ContentStatus.Available, ContentStatus.FakeAvailable,
-                                   ContentStatus.FinalFailed, ContentStatus.Missing]:
-            return True
-    return False
+        return input_dependency['substatus'] in TERMINATED_CONTENT_STATUS
+    return input_dependency[1] in TERMINATED_CONTENT_STATUS
 
 
 def is_all_contents_terminated_but_not_available(inputs, terminated=False):
-    terminated_status = [ContentStatus.Available, ContentStatus.FakeAvailable,
-                         ContentStatus.FinalFailed, ContentStatus.Missing]
-    if terminated:
-        terminated_status = [ContentStatus.Available, ContentStatus.FakeAvailable, ContentStatus.Failed,
-                             ContentStatus.FinalFailed, ContentStatus.Missing]
+    terminated_status = TERMINATED_CONTENT_STATUS_WITH_FAILED if terminated else TERMINATED_CONTENT_STATUS
 
     all_contents_available = True
     for content in inputs:
-        if type(content) is dict:
-            if content['substatus'] not in terminated_status:
-                return False
-            if content['substatus'] not in [ContentStatus.Available]:
-                all_contents_available = False
-        else:
-            if content[1] not in terminated_status:
-                return False
-            if content[1] not in [ContentStatus.Available]:
-                all_contents_available = False
+        substatus = content['substatus'] if type(content) is dict else content[1]
+        if substatus not in terminated_status:
+            return False
+        if substatus != ContentStatus.Available:
+            all_contents_available = False
+    return not all_contents_available
+
+
+def get_contents_terminated_status(contents, terminated=False):
+    """
+    Scan the contents once and return ContentStatus.Available if all of them are available,
+    ContentStatus.Missing if all of them are terminated but not all available, otherwise None.
+    """
+    terminated_status = TERMINATED_CONTENT_STATUS_WITH_FAILED if terminated else TERMINATED_CONTENT_STATUS
+
+    all_contents_available = True
+    for content in contents:
+        substatus = content['substatus'] if type(content) is dict else content[1]
+        if substatus not in terminated_status:
+            return None
+        if all_contents_available and substatus not in AVAILABLE_CONTENT_STATUS:
+            all_contents_available = False
     if all_contents_available:
-        return False
-    return True
+        return ContentStatus.Available
+    return ContentStatus.Missing
 
 
 def is_all_contents_available_with_status_map(inputs_dependency, content_status_map):
-    for content_id in inputs_dependency:
-        status = content_status_map[str(content_id)]
-        if status not in [ContentStatus.Available, ContentStatus.FakeAvailable]:
-            return False
-    return True
+    return all(content_status_map[str(content_id)] in AVAILABLE_CONTENT_STATUS for content_id in inputs_dependency)
 
 
 def is_all_contents_terminated_with_status_map(input_dependency, content_status_map):
-    for content_id in input_dependency:
-        status = content_status_map[str(content_id)]
-        if status not in [ContentStatus.Available, ContentStatus.FakeAvailable,
-                          ContentStatus.FinalFailed, ContentStatus.Missing]:
-            return False
-    return True
+    return all(content_status_map[str(content_id)] in TERMINATED_CONTENT_STATUS for content_id in input_dependency)
 
 
 def get_collection_ids(collections):
@@ -217,90 +219,52 @@ def get_ext_contents(transform_id, work):
 
 
 def get_new_contents(request_id, transform_id, workload_id, new_input_output_maps, max_updates_per_round=2000, logger=None, log_prefix=''):
+    """
+    Generate the new contents in chunks of about max_updates_per_round contents.
+
+    :returns: generator of (new_input_contents, new_output_contents, new_log_contents, new_input_dependency_contents).
+    """
+    if not new_input_output_maps:
+        return
+
     logger = get_logger(logger)
 
     logger.debug(log_prefix + "get_new_contents")
+    # bind the relation types once instead of looking them up for every map item
+    rel_input, rel_input_dep = ContentRelationType.Input, ContentRelationType.InputDependency
+    rel_output, rel_log = ContentRelationType.Output, ContentRelationType.Log
+
     new_input_contents, new_output_contents, new_log_contents = [], [], []
     new_input_dependency_contents = []
-    new_input_dep_coll_ids = []
-    chunks = []
     for map_id in new_input_output_maps:
-        if "sub_maps" not in new_input_output_maps[map_id] or not new_input_output_maps[map_id]["sub_maps"]:
-            inputs = new_input_output_maps[map_id]['inputs'] if 'inputs' in new_input_output_maps[map_id] else []
-            inputs_dependency = new_input_output_maps[map_id]['inputs_dependency'] if 'inputs_dependency' in new_input_output_maps[map_id] else []
-            outputs = new_input_output_maps[map_id]['outputs'] if 'outputs' in new_input_output_maps[map_id] else []
-            logs = new_input_output_maps[map_id]['logs'] if 'logs' in new_input_output_maps[map_id] else []
-
-            for input_content in inputs:
-                content = get_new_content(request_id, transform_id, workload_id, map_id, input_content, content_relation_type=ContentRelationType.Input)
-                new_input_contents.append(content)
-            for input_content in inputs_dependency:
-                content = get_new_content(request_id, transform_id, workload_id, map_id, input_content, content_relation_type=ContentRelationType.InputDependency)
-                new_input_dependency_contents.append(content)
-                if content['coll_id'] not in new_input_dep_coll_ids:
-                    new_input_dep_coll_ids.append(content['coll_id'])
-            for output_content in outputs:
-                content = get_new_content(request_id, transform_id, workload_id, map_id, output_content, content_relation_type=ContentRelationType.Output)
-                new_output_contents.append(content)
-            for log_content in logs:
-                content = get_new_content(request_id, transform_id, workload_id, map_id, log_content, content_relation_type=ContentRelationType.Log)
-                new_log_contents.append(content)
-
-            total_num_updates = len(new_input_contents) + len(new_output_contents) + len(new_log_contents) + len(new_input_dependency_contents)
-            if total_num_updates > max_updates_per_round:
-                chunk = new_input_contents, new_output_contents, new_log_contents, new_input_dependency_contents
-                chunks.append(chunk)
-
-                new_input_contents, new_output_contents, new_log_contents = [], [], []
-                new_input_dependency_contents = []
+        io_map = new_input_output_maps[map_id]
+        sub_maps = io_map.get("sub_maps")
+        if not sub_maps:
+            map_items = [(io_map, None, None)]
         else:
-            sub_maps = new_input_output_maps[map_id]["sub_maps"]
-            for sub_map in sub_maps:
-                sub_map_id = sub_map['sub_map_id']
-                order_id = sub_map['order_id']
-                inputs = sub_map['inputs'] if 'inputs' in sub_map else []
-                inputs_dependency = sub_map['inputs_dependency'] if 'inputs_dependency' in sub_map else []
-                outputs = sub_map['outputs'] if 'outputs' in sub_map else []
-                logs = sub_map['logs'] if 'logs' in sub_map else []
-
-                for input_content in inputs:
-                    content = get_new_content(request_id, transform_id, workload_id, map_id, input_content,
-                                              content_relation_type=ContentRelationType.Input,
-                                              sub_map_id=sub_map_id, order_id=order_id)
-                    new_input_contents.append(content)
-                for input_content in inputs_dependency:
-                    content = get_new_content(request_id, transform_id, workload_id, map_id, input_content,
-                                              content_relation_type=ContentRelationType.InputDependency,
+            map_items = [(sub_map, sub_map['sub_map_id'], sub_map['order_id']) for sub_map in sub_maps]
+
+        for map_item, sub_map_id, order_id in map_items:
+            for new_contents, relation_type, item_contents in ((new_input_contents, rel_input, map_item.get('inputs')),
+                                                               (new_input_dependency_contents, rel_input_dep, map_item.get('inputs_dependency')),
+                                                               (new_output_contents, rel_output, map_item.get('outputs')),
+                                                               (new_log_contents, rel_log, map_item.get('logs'))):
+                for item_content in item_contents or []:
+                    content = get_new_content(request_id, transform_id, workload_id, map_id, item_content,
+                                              content_relation_type=relation_type,
                                               sub_map_id=sub_map_id, order_id=order_id)
-                    new_input_dependency_contents.append(content)
-                    if content['coll_id'] not in new_input_dep_coll_ids:
-                        new_input_dep_coll_ids.append(content['coll_id'])
-                for output_content in outputs:
-                    content = get_new_content(request_id, transform_id, workload_id, map_id, output_content,
-                                              content_relation_type=ContentRelationType.Output,
-                                              sub_map_id=sub_map_id, order_id=order_id)
-                    new_output_contents.append(content)
-                for log_content in logs:
-                    content = get_new_content(request_id, transform_id, workload_id, map_id, log_content,
-                                              content_relation_type=ContentRelationType.Log,
-                                              sub_map_id=sub_map_id, order_id=order_id)
-                    new_log_contents.append(content)
+                    new_contents.append(content)
 
-            total_num_updates = len(new_input_contents) + len(new_output_contents) + len(new_log_contents) + len(new_input_dependency_contents)
-            if total_num_updates > max_updates_per_round:
-                chunk = new_input_contents, new_output_contents, new_log_contents, new_input_dependency_contents
-                chunks.append(chunk)
+        total_num_updates = len(new_input_contents) + len(new_output_contents) + len(new_log_contents) + len(new_input_dependency_contents)
+        if total_num_updates > max_updates_per_round:
+            yield new_input_contents, new_output_contents, new_log_contents, new_input_dependency_contents
 
-                new_input_contents, new_output_contents, new_log_contents = [], [], []
-                new_input_dependency_contents = []
+            new_input_contents, new_output_contents, new_log_contents = [], [], []
+            new_input_dependency_contents = []
 
     total_num_updates = len(new_input_contents) + len(new_output_contents) + len(new_log_contents) + len(new_input_dependency_contents)
     if total_num_updates > 0:
-        chunk = new_input_contents, new_output_contents, new_log_contents, new_input_dependency_contents
-        chunks.append(chunk)
-
-    # return new_input_contents, new_output_contents, new_log_contents, new_input_dependency_contents
-    return chunks
+        yield new_input_contents, new_output_contents, new_log_contents, new_input_dependency_contents
 
 
 def get_update_content(content):
@@ -317,9 +281,9 @@ def get_update_contents(request_id, transform_id, workload_id, input_output_maps
     updated_input_contents_full, updated_output_contents_full = [], []
 
     for map_id in input_output_maps:
-        inputs = input_output_maps[map_id]['inputs'] if 'inputs' in input_output_maps[map_id] else []
-        inputs_dependency = input_output_maps[map_id]['inputs_dependency'] if 'inputs_dependency' in input_output_maps[map_id] else []
-        outputs = input_output_maps[map_id]['outputs'] if 'outputs' in input_output_maps[map_id] else []
+        inputs = input_output_maps[map_id].get('inputs', [])
+        inputs_dependency = input_output_maps[map_id].get('inputs_dependency', [])
+        outputs = input_output_maps[map_id].get('outputs', [])
         # logs = input_output_maps[map_id]['logs'] if 'logs' in input_output_maps[map_id] else []
 
         input_output_sub_maps = get_input_output_sub_maps(inputs, outputs, inputs_dependency)
@@ -328,13 +292,7 @@ def get_update_contents(request_id, transform_id, workload_id, input_output_maps
             outputs_sub = input_output_sub_maps[sub_map_id]['outputs']
             inputs_dependency_sub = input_output_sub_maps[sub_map_id]['inputs_dependency']
 
-            content_update_status = None
-            if is_all_contents_available(inputs_dependency_sub):
-                # logger.debug("all input dependency available: %s, inputs: %s" % (str(inputs_dependency), str(inputs)))
-                content_update_status = ContentStatus.Available
-            elif is_all_contents_terminated(inputs_dependency_sub):
-                # logger.debug("all input dependency terminated: %s, inputs: %s, outputs: %s" % (str(inputs_dependency), str(inputs), str(outputs)))
-                content_update_status = ContentStatus.Missing
+            content_update_status = get_contents_terminated_status(inputs_dependency_sub)
 
             if content_update_status:
                 for content in inputs_sub:
@@ -343,28 +301,24 @@ def get_update_contents(request_id, transform_id, workload_id, input_output_maps
                         updated_content, content = get_update_content(content)
                         updated_contents.append(updated_content)
                         updated_input_contents_full.append(content)
-            if content_update_status in [ContentStatus.Missing]:
+            if content_update_status == ContentStatus.Missing:
                 for content in outputs_sub:
                     content['substatus'] = content_update_status
                     if content['status'] != content['substatus']:
                         updated_content, content = get_update_content(content)
                         updated_contents.append(updated_content)
                         updated_output_contents_full.append(content)
-
-            for content in outputs_sub:
-                if content['status'] != content['substatus']:
-                    updated_content, content = get_update_content(content)
-                    updated_contents.append(updated_content)
-                    updated_output_contents_full.append(content)
-        return updated_contents, updated_input_contents_full, updated_output_contents_full
+            else:
+                for content in outputs_sub:
+                    if content['status'] != content['substatus']:
+                        updated_content, content = get_update_content(content)
+                        updated_contents.append(updated_content)
+                        updated_output_contents_full.append(content)
+    return updated_contents, updated_input_contents_full, updated_output_contents_full
 
 
 def get_message_type(work_type, input_type='file'):
-    work_type_value = str(work_type.value)
-    if work_type_value not in TransformType2MessageTypeMap:
-        return TransformType2MessageTypeMap['0'][input_type]
-    else:
-        return TransformType2MessageTypeMap[work_type_value][input_type]
+    return MESSAGE_TYPES_BY_WORK_TYPE.get(work_type, UNKNOWN_MESSAGE_TYPES)[input_type]
 
 
 def generate_file_messages(request_id, transform_id, workload_id, work, files, relation_type):
@@ -374,28 +328,26 @@ def generate_file_messages(request_id, transform_id, workload_id, work, files, r
         work_type = TransformType.Processing
 
     i_msg_type, i_msg_type_str = get_message_type(work_type, input_type='file')
-    no_dup_files = {}
+    status_names = FILE_MESSAGE_STATUS_NAMES
+    is_es = work and work.es
+    no_dup_files = set()
     files_message = []
     for file in files:
         filename = file['name']
-        if work and work.es:
+        if is_es:
             filename = file['path']
             if filename in no_dup_files:
                 continue
-            else:
-                no_dup_files[filename] = None
+            no_dup_files.add(filename)
 
-        file_status = file['substatus'].name
-        if file['substatus'] == ContentStatus.FakeAvailable:
-            file_status = ContentStatus.Available.name
         file_message = {'scope': file['scope'],
                         'name': filename,
                         'path': file['path'],
                         'map_id': file['map_id'],
-                        'content_id': file['content_id'] if 'content_id' in file else None,
-                        'external_coll_id': file['external_coll_id'] if 'external_coll_id' in file else None,
-                        'external_content_id': file['external_content_id'] if 'external_content_id' in file else None,
-                        'status': file_status}
+                        'content_id': file.get('content_id'),
+                        'external_coll_id': file.get('external_coll_id'),
+                        'external_content_id': file.get('external_content_id'),
+                        'status': status_names[file['substatus']]}
         files_message.append(file_message)
     msg_content = {'msg_type': i_msg_type_str.value,
                    'request_id': request_id,
@@ -411,12 +363,7 @@ def generate_content_ext_messages(request_id, transform_id, workload_id, work, f
     i_msg_type = MessageType.ContentExt
     i_msg_type_str = MessageTypeStr.ContentExt
 
-    output_contents = []
-    for map_id in input_output_maps:
-        outputs = input_output_maps[map_id]['outputs'] if 'outputs' in input_output_maps[map_id] else []
-        for content in outputs:
-            # content_map[content['content_id']] = content
-            output_contents += outputs
+    output_contents = list(itertools.chain.from_iterable(io_map.get('outputs', []) for io_map in input_output_maps.values()))
 
     files_message = core_catalog.combine_contents_ext(output_contents, files, with_status_name=True)
     msg_content = {'msg_type': i_msg_type_str.value,
@@ -429,24 +376,34 @@ def generate_content_ext_messages(request_id, transform_id, workload_id, work, f
     return i_msg_type, msg_content, num_msg_content
 
 
-def generate_collection_messages(request_id, transform_id, workload_id, work, collection, relation_type):
-    coll_name = collection.name
-    if coll_name.endswith(".idds.stagein"):
-        coll_name = coll_name.replace(".idds.stagein", "")
-
+def generate_collections_messages(request_id, transform_id, workload_id, work, collections):
+    """
+    Generate collection messages for a list of (collection, relation_type).
+    The message type and the work output/error are the same for all of them, so they are resolved once.
+    """
     i_msg_type, i_msg_type_str = get_message_type(work.get_work_type(), input_type='collection')
-    msg_content = {'msg_type': i_msg_type_str.value,
-                   'request_id': request_id,
-                   'workload_id': workload_id,
-                   'transform_id': transform_id,
-                   'relation_type': relation_type,
-                   'collections': [{'scope': collection.scope,
-                                    'name': coll_name,
-                                    'status': collection.status.name}],
-                   'output': work.get_output_data(),
-                   'error': work.get_terminated_msg()}
-    num_msg_content = 1
-    return i_msg_type, msg_content, num_msg_content
+    msg_type_str = i_msg_type_str.value
+    output = work.get_output_data()
+    error = work.get_terminated_msg()
+
+    msg_type_contents = []
+    for collection, relation_type in collections:
+        coll_name = collection.name
+        if coll_name.endswith(".idds.stagein"):
+            coll_name = coll_name.replace(".idds.stagein", "")
+
+        msg_content = {'msg_type': msg_type_str,
+                       'request_id': request_id,
+                       'workload_id': workload_id,
+                       'transform_id': transform_id,
+                       'relation_type': relation_type,
+                       'collections': [{'scope': collection.scope,
+                                        'name': coll_name,
+                                        'status': collection.status.name}],
+                       'output': output,
+                       'error': error}
+        msg_type_contents.append((i_msg_type, msg_content, 1))
+    return msg_type_contents
 
 
 def generate_work_messages(request_id, transform_id, workload_id, work, relation_type):
@@ -463,84 +420,56 @@ def generate_work_messages(request_id, transform_id, workload_id, work, relation
     return i_msg_type, msg_content, num_msg_content
 
 
+def generate_message_envelope(request_id, transform_id, workload_id, i_msg_type, msg_content, num_msg_content,
+                              destination=MessageDestination.Outside):
+    return {'msg_type': i_msg_type,
+            'status': MessageStatus.New,
+            'source': MessageSource.Carrier,
+            'destination': destination,
+            'request_id': request_id,
+            'workload_id': workload_id,
+            'transform_id': transform_id,
+            'num_contents': num_msg_content,
+            'msg_content': msg_content}
+
+
 def generate_messages(request_id, transform_id, workload_id, work, msg_type='file', files=[], relation_type='input', input_output_maps=None):
+    destination = MessageDestination.Outside
     if msg_type == 'file':
-        i_msg_type, msg_content, num_msg_content = generate_file_messages(request_id, transform_id, workload_id, work, files=files, relation_type=relation_type)
-        msg = {'msg_type': i_msg_type,
-               'status': MessageStatus.New,
-               'source': MessageSource.Carrier,
-               'destination': MessageDestination.Outside,
-               'request_id': request_id,
-               'workload_id': workload_id,
-               'transform_id': transform_id,
-               'num_contents': num_msg_content,
-               'msg_content': msg_content}
-        return [msg]
+        msg_type_contents = [generate_file_messages(request_id, transform_id, workload_id, work, files=files, relation_type=relation_type)]
     elif msg_type == 'content_ext':
-        i_msg_type, msg_content, num_msg_content = generate_content_ext_messages(request_id, transform_id, workload_id, work, files=files,
-                                                                                 relation_type=relation_type,
-                                                                                 input_output_maps=input_output_maps)
-        msg = {'msg_type': i_msg_type,
-               'status': MessageStatus.New,
-               'source': MessageSource.Carrier,
-               'destination': MessageDestination.ContentExt,
-               'request_id': request_id,
-               'workload_id': workload_id,
-               'transform_id': transform_id,
-               'num_contents': num_msg_content,
-               'msg_content': msg_content}
-        return [msg]
+        destination = MessageDestination.ContentExt
+        msg_type_contents = [generate_content_ext_messages(request_id, transform_id, workload_id, work, files=files,
+                                                           relation_type=relation_type,
+                                                           input_output_maps=input_output_maps)]
     elif msg_type == 'collection':
-        msg_type_contents = []
-        for coll in files:
-            msg_type_content = generate_collection_messages(request_id, transform_id, workload_id, work, coll, relation_type=relation_type)
-            msg_type_contents.append(msg_type_content)
-
-        msgs = []
-        for i_msg_type, msg_content, num_msg_content in msg_type_contents:
-            msg = {'msg_type': i_msg_type,
-                   'status': MessageStatus.New,
-                   'source': MessageSource.Carrier,
-                   'destination': MessageDestination.Outside,
-                   'request_id': request_id,
-                   'workload_id': workload_id,
-                   'transform_id': transform_id,
-                   'num_contents': num_msg_content,
-                   'msg_content': msg_content}
-            msgs.append(msg)
-        return msgs
+        msg_type_contents = generate_collections_messages(request_id, transform_id, workload_id, work,
+                                                          [(coll, relation_type) for coll in files])
     elif msg_type == 'work':
         # link collections
         input_collections = work.get_input_collections()
         output_collections = work.get_output_collections()
         log_collections = work.get_log_collections()
 
-        msg_type_contents = []
-        msg_type_content = generate_work_messages(request_id, transform_id, workload_id, work, relation_type='input')
-        msg_type_contents.append(msg_type_content)
-        for coll in input_collections:
-            msg_type_content = generate_collection_messages(request_id, transform_id, workload_id, work, coll, relation_type='input')
-            msg_type_contents.append(msg_type_content)
-        for coll in output_collections:
-            msg_type_content = generate_collection_messages(request_id, transform_id, workload_id, work, coll, relation_type='output')
-            msg_type_contents.append(msg_type_content)
-        for coll in log_collections:
-            msg_type_content = generate_collection_messages(request_id, transform_id, workload_id, work, coll, relation_type='log')
-            msg_type_contents.append(msg_type_content)
+        msg_type_contents = [generate_work_messages(request_id, transform_id, workload_id, work, relation_type='input')]
+        collections = itertools.chain(((coll, 'input') for coll in input_collections),
+                                      ((coll, 'output') for coll in output_collections),
+                                      ((coll, 'log') for coll in log_collections))
+        msg_type_contents.extend(generate_collections_messages(request_id, transform_id, workload_id, work, collections))
+    else:
+        return None
 
-        msgs = []
-        for i_msg_type, msg_content, num_msg_content in msg_type_contents:
-            msg = {'msg_type': i_msg_type,
-                   'status': MessageStatus.New,
-                   'source': MessageSource.Carrier,
-                   'destination': MessageDestination.Outside,
-                   'request_id': request_id,
-                   'workload_id': workload_id,
-                   'transform_id': transform_id,
-                   'num_contents': num_msg_content,
-                   'msg_content': msg_content}
-            msgs.append(msg)
-        return msgs
+    return [generate_message_envelope(request_id, transform_id, workload_id, i_msg_type, msg_content, num_msg_content, destination=destination)
+            for i_msg_type, msg_content, num_msg_content in msg_type_contents]
+
+
+def add_file_messages(msgs, request_id, transform_id, workload_id, work, files, relation_type):
+    """
+    Append the file messages of the given files to msgs, nothing is generated for an empty list.
+    """
+    if files:
+        msgs.extend(generate_messages(request_id, transform_id, workload_id, work, msg_type='file',
+                                      files=files, relation_type=relation_type))
 
 
 def update_processing_contents_thread(logger, log_prefix, log_msg, kwargs):
@@ -598,7 +527,7 @@ def handle_new_processing(processing, agent_attributes, func_site_to_cloud=None,
         input_collections = work.get_input_collections()
         output_collections = work.get_output_collections()
         log_collections = work.get_log_collections()
-        for coll in input_collections + output_collections + log_collections:
+        for coll in itertools.chain(input_collections, output_collections, log_collections):
             u_coll = {'coll_id': coll.coll_id, 'workload_id': proc.workload_id}
             update_collections.append(u_coll)
 
@@ -614,7 +543,7 @@ def handle_new_processing(processing, agent_attributes, func_site_to_cloud=None,
             for ret_new_contents in ret_new_contents_chunks:
                 new_input_contents, new_output_contents, new_log_contents, new_input_dependency_contents = ret_new_contents
                 # new_contents = new_input_contents + new_output_contents + new_log_contents + new_input_dependency_contents
-                new_contents = new_input_contents + new_output_contents + new_log_contents
+                new_contents = list(itertools.chain(new_input_contents, new_output_contents, new_log_contents))
 
                 # not generate new messages
                 # if new_input_contents:
@@ -633,7 +562,7 @@ def handle_new_processing(processing, agent_attributes, func_site_to_cloud=None,
             ret_futures = set()
             for ret_new_contents in ret_new_contents_chunks:
                 new_input_contents, new_output_contents, new_log_contents, new_input_dependency_contents = ret_new_contents
-                new_contents = new_input_contents + new_output_contents + new_log_contents
+                new_contents = list(itertools.chain(new_input_contents, new_output_contents, new_log_contents))
                 log_msg = "handle_new_processing thread: add %s new contents" % (len(new_contents))
                 kwargs = {'update_processing': None,
                           'request_id': request_id,
@@ -711,9 +640,9 @@ def get_updated_contents_by_input_output_maps(input_output_maps=None, terminated
                        ContentStatus.Deleted]
 
     for map_id in input_output_maps:
-        inputs = input_output_maps[map_id]['inputs'] if 'inputs' in input_output_maps[map_id] else []
-        inputs_dependency = input_output_maps[map_id]['inputs_dependency'] if 'inputs_dependency' in input_output_maps[map_id] else []
-        outputs = input_output_maps[map_id]['outputs'] if 'outputs' in input_output_maps[map_id] else []
+        inputs = input_output_maps[map_id].get('inputs', [])
+        inputs_dependency = input_output_maps[map_id].get('inputs_dependency', [])
+        outputs = input_output_maps[map_id].get('outputs', [])
         # logs = input_output_maps[map_id]['logs'] if 'logs' in input_output_maps[map_id] else []
 
         input_output_sub_maps = get_input_output_sub_maps(inputs, outputs, inputs_dependency)
@@ -761,11 +690,7 @@ def get_updated_contents_by_input_output_maps(input_output_maps=None, terminated
             outputs_sub = input_output_sub_maps[sub_map_id]['outputs']
             inputs_dependency_sub = input_output_sub_maps[sub_map_id]['inputs_dependency']
 
-            input_content_update_status = None
-            if is_all_contents_available(inputs_dependency_sub):
-                input_content_update_status = ContentStatus.Available
-            elif is_all_contents_terminated(inputs_dependency_sub, terminated):
-                input_content_update_status = ContentStatus.Missing
+            input_content_update_status = get_contents_terminated_status(inputs_dependency_sub, terminated)
             if input_content_update_status:
                 for content in inputs_sub:
                     if content['substatus'] != input_content_update_status:
@@ -786,11 +711,9 @@ def get_updated_contents_by_input_output_maps(input_output_maps=None, terminated
                                                'coll_id': content['coll_id']}
                         new_update_contents.append(u_content_substatus)
 
+            # if all inputs are available, wait for the job to finish
             output_content_update_status = None
-            if is_all_contents_available(inputs_sub):
-                # wait for the job to finish
-                pass
-            elif is_all_contents_terminated_but_not_available(inputs_sub, terminated):
+            if get_contents_terminated_status(inputs_sub, terminated) == ContentStatus.Missing:
                 output_content_update_status = ContentStatus.Missing
             if output_content_update_status:
                 for content in outputs_sub:
@@ -989,9 +912,9 @@ def trigger_release_inputs_no_deps(request_id, transform_id, workload_id, work,
     update_input_contents_full[transform_id] = []
 
     for map_id in input_output_maps:
-        inputs = input_output_maps[map_id]['inputs'] if 'inputs' in input_output_maps[map_id] else []
-        inputs_dependency = input_output_maps[map_id]['inputs_dependency'] if 'inputs_dependency' in input_output_maps[map_id] else []
-        outputs = input_output_maps[map_id]['outputs'] if 'outputs' in input_output_maps[map_id] else []
+        inputs = input_output_maps[map_id].get('inputs', [])
+        inputs_dependency = input_output_maps[map_id].get('inputs_dependency', [])
+        outputs = input_output_maps[map_id].get('outputs', [])
         # logs = input_output_maps[map_id]['logs'] if 'logs' in input_output_maps[map_id] else []
 
         input_output_sub_maps = get_input_output_sub_maps(inputs, outputs, inputs_dependency)
@@ -1018,19 +941,15 @@ def trigger_release_inputs(request_id, transform_id, workload_id, work, updated_
                            updated_contents_full_input_deps, input_output_maps, logger=None, log_prefix=''):
     logger = get_logger(logger)
 
-    status_to_check = [ContentStatus.Available, ContentStatus.FakeAvailable, ContentStatus.FinalFailed, ContentStatus.Missing]
+    status_to_check = TERMINATED_CONTENT_STATUS
     # status_to_check_fake = [ContentStatus.FakeAvailable, ContentStatus.Missing]
 
     update_contents = []
-    update_contents_status = {}
-    update_contents_status_name = {}
+    update_contents_status = {status.name: [] for status in status_to_check}
+    update_contents_status_name = {status.name: status for status in status_to_check}
     update_input_contents_full = {}
     update_input_contents_full[transform_id] = []
 
-    for status in status_to_check:
-        update_contents_status[status.name] = []
-        update_contents_status_name[status.name] = status
-
     for content in updated_contents_full_output:
         # update the status
         # u_content = {'content_id': content['content_id'], 'status': content['substatus']}
@@ -1040,9 +959,9 @@ def trigger_release_inputs(request_id, transform_id, workload_id, work, updated_
             update_contents_status[content['substatus'].name].append(content['content_id'])
 
     for map_id in input_output_maps:
-        inputs = input_output_maps[map_id]['inputs'] if 'inputs' in input_output_maps[map_id] else []
-        inputs_dependency = input_output_maps[map_id]['inputs_dependency'] if 'inputs_dependency' in input_output_maps[map_id] else []
-        outputs = input_output_maps[map_id]['outputs'] if 'outputs' in input_output_maps[map_id] else []
+        inputs = input_output_maps[map_id].get('inputs', [])
+        inputs_dependency = input_output_maps[map_id].get('inputs_dependency', [])
+        outputs = input_output_maps[map_id].get('outputs', [])
         # logs = input_output_maps[map_id]['logs'] if 'logs' in input_output_maps[map_id] else []
 
         input_output_sub_maps = get_input_output_sub_maps(inputs, outputs, inputs_dependency)
@@ -1051,11 +970,7 @@ def trigger_release_inputs(request_id, transform_id, workload_id, work, updated_
             outputs_sub = input_output_sub_maps[sub_map_id]['outputs']
             inputs_dependency_sub = input_output_sub_maps[sub_map_id]['inputs_dependency']
 
-            input_content_update_status = None
-            if is_all_contents_available(inputs_dependency_sub):
-                input_content_update_status = ContentStatus.Available
-            elif is_all_contents_terminated(inputs_dependency_sub):
-                input_content_update_status = ContentStatus.Missing
+            input_content_update_status = get_contents_terminated_status(inputs_dependency_sub)
             if input_content_update_status:
                 for content in inputs_dependency_sub:
                     # u_content = {'content_id': content['content_id'], 'status': content['substatus'])
@@ -1070,18 +985,9 @@ def trigger_release_inputs(request_id, transform_id, workload_id, work, updated_
                     content['substatus'] = input_content_update_status
                     update_input_contents_full[transform_id].append(content)
 
+            # if all inputs are available, wait for the job to finish
             output_content_update_status = None
-            if is_all_contents_available(inputs_sub):
-                # wait for the job to finish
-                # for content in inputs:
-                #     u_content = {'content_id': content['content_id'], 'status': content['substatus'])
-                #     update_contents.append(u_content)
-                pass
-            elif is_all_contents_terminated_but_not_available(inputs_sub):
-                # for content in inputs:
-                #     u_content = {'content_id': content['content_id'], 'status': content['substatus'])
-                #     update_contents.append(u_content)
-                pass
+            if get_contents_terminated_status(inputs_sub) == ContentStatus.Missing:
                 output_content_update_status = ContentStatus.Missing
             if output_content_update_status:
                 for content in outputs_sub:
@@ -1098,9 +1004,9 @@ def poll_missing_outputs(input_output_maps, max_updates_per_round=2000):
 
     chunks = []
     for map_id in input_output_maps:
-        inputs = input_output_maps[map_id]['inputs'] if 'inputs' in input_output_maps[map_id] else []
-        inputs_dependency = input_output_maps[map_id]['inputs_dependency'] if 'inputs_dependency' in input_output_maps[map_id] else []
-        outputs = input_output_maps[map_id]['outputs'] if 'outputs' in input_output_maps[map_id] else []
+        inputs = input_output_maps[map_id].get('inputs', [])
+        inputs_dependency = input_output_maps[map_id].get('inputs_dependency', [])
+        outputs = input_output_maps[map_id].get('outputs', [])
         # logs = input_output_maps[map_id]['logs'] if 'logs' in input_output_maps[map_id] else []
 
         input_output_sub_maps = get_input_output_sub_maps(inputs, outputs, inputs_dependency)
@@ -1135,24 +1041,15 @@ def poll_missing_outputs(input_output_maps, max_updates_per_round=2000):
 
 
 def has_external_content_id(input_output_maps):
-    for map_id in input_output_maps:
-        inputs = input_output_maps[map_id]['inputs'] if 'inputs' in input_output_maps[map_id] else []
-        for content in inputs:
-            if not content['external_content_id']:
-                return False
-    return True
+    return all(content['external_content_id'] for io_map in input_output_maps.values() for content in io_map.get('inputs', []))
 
 
 def get_update_external_content_ids(input_output_maps, external_content_ids):
     name_to_id_map = {}
     update_contents = []
-    for map_id in input_output_maps:
-        inputs = input_output_maps[map_id]['inputs'] if 'inputs' in input_output_maps[map_id] else []
-        outputs = input_output_maps[map_id]['outputs'] if 'outputs' in input_output_maps[map_id] else []
-        for content in inputs + outputs:
-            if content['name'] not in name_to_id_map:
-                name_to_id_map[content['name']] = []
-            name_to_id_map[content['name']].append(content['content_id'])
+    for io_map in input_output_maps.values():
+        for content in itertools.chain(io_map.get('inputs', []), io_map.get('outputs', [])):
+            name_to_id_map.setdefault(content['name'], []).append(content['content_id'])
     for dataset in external_content_ids:
         dataset_id = dataset['dataset']['id']
         files = dataset['files']
@@ -1212,10 +1109,11 @@ def handle_update_processing(processing, agent_attributes, max_updates_per_round
         process_status, content_updates, new_input_output_maps1, updated_contents_full, parameters = ret_poll_processing
 
     new_input_output_maps.update(new_input_output_maps1)
-    logger.debug(log_prefix + "poll_processing_updates process_status: %s" % process_status)
-    logger.debug(log_prefix + "poll_processing_updates content_updates[:3]: %s" % content_updates[:3])
-    logger.debug(log_prefix + "poll_processing_updates new_input_output_maps1.keys[:3]: %s" % (list(new_input_output_maps1.keys())[:3]))
-    logger.debug(log_prefix + "poll_processing_updates updated_contents_full[:3]: %s" % (updated_contents_full[:3]))
+    if logger.isEnabledFor(logging.DEBUG):
+        logger.debug(log_prefix + "poll_processing_updates process_status: %s" % process_status)
+        logger.debug(log_prefix + "poll_processing_updates content_updates[:3]: %s" % content_updates[:3])
+        logger.debug(log_prefix + "poll_processing_updates new_input_output_maps1.keys[:3]: %s" % (list(new_input_output_maps1.keys())[:3]))
+        logger.debug(log_prefix + "poll_processing_updates updated_contents_full[:3]: %s" % (updated_contents_full[:3]))
 
     ret_futures = set()
 
@@ -1224,17 +1122,11 @@ def handle_update_processing(processing, agent_attributes, max_updates_per_round
         new_input_contents, new_output_contents, new_log_contents, new_input_dependency_contents = ret_new_contents
 
         ret_msgs = []
-        if new_input_contents:
-            msgs = generate_messages(request_id, transform_id, workload_id, work, msg_type='file',
-                                     files=new_input_contents, relation_type='input')
-            ret_msgs = ret_msgs + msgs
-        if new_output_contents:
-            msgs = generate_messages(request_id, transform_id, workload_id, work, msg_type='file',
-                                     files=new_output_contents, relation_type='output')
-            ret_msgs = ret_msgs + msgs
+        add_file_messages(ret_msgs, request_id, transform_id, workload_id, work, files=new_input_contents, relation_type='input')
+        add_file_messages(ret_msgs, request_id, transform_id, workload_id, work, files=new_output_contents, relation_type='output')
 
         # new_contents = new_input_contents + new_output_contents + new_log_contents + new_input_dependency_contents
-        new_contents = new_input_contents + new_output_contents + new_log_contents
+        new_contents = list(itertools.chain(new_input_contents, new_output_contents, new_log_contents))
 
         if executors is None:
             logger.debug(log_prefix + "handle_update_processing: add %s new contents" % (len(new_contents)))
@@ -1448,7 +1340,8 @@ def handle_trigger_processing(processing, agent_attributes, trigger_new_updates=
         for chunk in new_contents_update_list_chunks:
             has_updates = True
             if executors is None:
-                logger.debug(log_prefix + "new_contents_update chunk[:3](total: %s): %s" % (len(chunk), str(chunk[:3])))
+                if logger.isEnabledFor(logging.DEBUG):
+                    logger.debug(log_prefix + "new_contents_update chunk[:3](total: %s): %s" % (len(chunk), str(chunk[:3])))
                 # core_catalog.update_contents(chunk, request_id=request_id, transform_id=transform_id, use_bulk_update_mappings=False)
                 core_catalog.update_contents(chunk, request_id=request_id, transform_id=transform_id, use_bulk_update_mappings=True)
             else:
@@ -1475,7 +1368,8 @@ def handle_trigger_processing(processing, agent_attributes, trigger_new_updates=
         for chunk in to_triggered_contents_chunks:
             has_updates = True
             if executors is None:
-                logger.debug(log_prefix + "update_contents_from_others_by_dep_id chunk[:3](total: %s): %s" % (len(chunk), str(chunk[:3])))
+                if logger.isEnabledFor(logging.DEBUG):
+                    logger.debug(log_prefix + "update_contents_from_others_by_dep_id chunk[:3](total: %s): %s" % (len(chunk), str(chunk[:3])))
                 core_catalog.update_contents(chunk, request_id=request_id, transform_id=transform_id, use_bulk_update_mappings=False)
             else:
                 log_msg = "update_contents_from_others_by_dep_id thread chunk[:3](total: %s): %s" % (len(chunk), str(chunk[:3]))
@@ -1509,16 +1403,9 @@ def handle_trigger_processing(processing, agent_attributes, trigger_new_updates=
         for updated_contents_ret in updated_contents_ret_chunks:
             updated_contents, updated_contents_full_input, updated_contents_full_output, updated_contents_full_input_deps, new_update_contents = updated_contents_ret
 
-            if updated_contents_full_input:
-                # if the content is updated by receiver, here is the place to broadcast the messages
-                msgs = generate_messages(request_id, transform_id, workload_id, work, msg_type='file',
-                                         files=updated_contents_full_input, relation_type='input')
-                ret_msgs = ret_msgs + msgs
-            if updated_contents_full_output:
-                # if the content is updated by receiver, here is the place to broadcast the messages
-                msgs = generate_messages(request_id, transform_id, workload_id, work, msg_type='file',
-                                         files=updated_contents_full_output, relation_type='output')
-                ret_msgs = ret_msgs + msgs
+            # if the content is updated by receiver, here is the place to broadcast the messages
+            add_file_messages(ret_msgs, request_id, transform_id, workload_id, work, files=updated_contents_full_input, relation_type='input')
+            add_file_messages(ret_msgs, request_id, transform_id, workload_id, work, files=updated_contents_full_output, relation_type='output')
 
             # content_updates = content_updates + updated_contents
 
@@ -1526,7 +1413,8 @@ def handle_trigger_processing(processing, agent_attributes, trigger_new_updates=
                 has_updates = True
 
             if executors is None:
-                logger.debug(log_prefix + "handle_trigger_processing: updated_contents[:3] (total: %s): %s" % (len(updated_contents), updated_contents[:3]))
+                if logger.isEnabledFor(logging.DEBUG):
+                    logger.debug(log_prefix + "handle_trigger_processing: updated_contents[:3] (total: %s): %s" % (len(updated_contents), updated_contents[:3]))
                 core_processings.update_processing_contents(update_processing=None,
                                                             update_contents=updated_contents,
                                                             # new_update_contents=new_update_contents,
@@ -1914,35 +1802,27 @@ def sync_collection_status(request_id, transform_id, workload_id, work, input_ou
     all_updates_flushed = True
     coll_status = {}
     messages = []
+    file_counters = FILE_COUNTER_BY_CONTENT_STATUS
     for map_id in input_output_maps:
-        inputs = input_output_maps[map_id]['inputs'] if 'inputs' in input_output_maps[map_id] else []
-        # inputs_dependency = input_output_maps[map_id]['inputs_dependency'] if 'inputs_dependency' in input_output_maps[map_id] else []
-        outputs = input_output_maps[map_id]['outputs'] if 'outputs' in input_output_maps[map_id] else []
-        logs = input_output_maps[map_id]['logs'] if 'logs' in input_output_maps[map_id] else []
-
-        for content in inputs + outputs + logs:
-            if content['coll_id'] not in coll_status:
-                coll_status[content['coll_id']] = {'total_files': 0, 'processed_files': 0, 'processing_files': 0, 'bytes': 0,
-                                                   'new_files': 0, 'failed_files': 0, 'missing_files': 0,
-                                                   'ext_files': 0, 'processed_ext_files': 0, 'failed_ext_files': 0,
-                                                   'missing_ext_files': 0}
-            coll_status[content['coll_id']]['total_files'] += 1
-
-            if content['status'] in [ContentStatus.Available, ContentStatus.Mapped,
-                                     ContentStatus.Available.value, ContentStatus.Mapped.value,
-                                     ContentStatus.FakeAvailable, ContentStatus.FakeAvailable.value]:
-                coll_status[content['coll_id']]['processed_files'] += 1
-                coll_status[content['coll_id']]['bytes'] += content['bytes']
-            elif content['status'] in [ContentStatus.New]:
-                coll_status[content['coll_id']]['new_files'] += 1
-            elif content['status'] in [ContentStatus.Failed, ContentStatus.FinalFailed]:
-                coll_status[content['coll_id']]['failed_files'] += 1
-            elif content['status'] in [ContentStatus.Lost, ContentStatus.Deleted, ContentStatus.Missing]:
-                coll_status[content['coll_id']]['missing_files'] += 1
-            else:
-                coll_status[content['coll_id']]['processing_files'] += 1
-
-            if content['status'] != content['substatus']:
+        io_map = input_output_maps[map_id]
+        # inputs_dependency = io_map.get('inputs_dependency', [])
+        for content in itertools.chain(io_map.get('inputs', []), io_map.get('outputs', []), io_map.get('logs', [])):
+            content_status = content['status']
+            stats = coll_status.get(content['coll_id'])
+            if stats is None:
+                stats = {'total_files': 0, 'processed_files': 0, 'processing_files': 0, 'bytes': 0,
+                         'new_files': 0, 'failed_files': 0, 'missing_files': 0,
+                         'ext_files': 0, 'processed_ext_files': 0, 'failed_ext_files': 0,
+                         'missing_ext_files': 0}
+                coll_status[content['coll_id']] = stats
+            stats['total_files'] += 1
+
+            file_counter = file_counters.get(content_status, 'processing_files')
+            stats[file_counter] += 1
+            if file_counter == 'processed_files':
+                stats['bytes'] += content['bytes']
+
+            if all_updates_flushed and content_status != content['substatus']:
                 all_updates_flushed = False
 
     all_ext_updated = True
@@ -1950,39 +1830,38 @@ def sync_collection_status(request_id, transform_id, workload_id, work, input_ou
         all_ext_updated = False
         contents_ext = core_catalog.get_contents_ext(request_id=request_id, transform_id=transform_id)
         for content in contents_ext:
-            coll_status[content['coll_id']]['ext_files'] += 1
-
-            if content['status'] in [ContentStatus.Available, ContentStatus.Mapped,
-                                     ContentStatus.Available.value, ContentStatus.Mapped.value,
-                                     ContentStatus.FakeAvailable, ContentStatus.FakeAvailable.value]:
-                coll_status[content['coll_id']]['processed_ext_files'] += 1
-            # elif content['status'] in [ContentStatus.Failed, ContentStatus.FinalFailed]:
-            elif content['status'] in [ContentStatus.Failed, ContentStatus.FinalFailed]:
-                coll_status[content['coll_id']]['failed_ext_files'] += 1
-            elif content['status'] in [ContentStatus.Lost, ContentStatus.Deleted, ContentStatus.Missing]:
-                coll_status[content['coll_id']]['missing_ext_files'] += 1
+            stats = coll_status[content['coll_id']]
+            stats['ext_files'] += 1
+
+            if content['status'] in PROCESSED_CONTENT_STATUS:
+                stats['processed_ext_files'] += 1
+            elif content['status'] in FAILED_CONTENT_STATUS:
+                stats['failed_ext_files'] += 1
+            elif content['status'] in MISSING_CONTENT_STATUS:
+                stats['missing_ext_files'] += 1
 
     input_collections = work.get_input_collections(poll_externel=True)
     output_collections = work.get_output_collections()
     log_collections = work.get_log_collections()
 
-    update_collections = []
-    for coll in input_collections + output_collections + log_collections:
-        if coll.coll_id in coll_status:
+    all_collections = input_collections + output_collections + log_collections
+    for coll in all_collections:
+        stats = coll_status.get(coll.coll_id)
+        if stats is not None:
             if 'total_files' in coll.coll_metadata and coll.coll_metadata['total_files']:
                 coll.total_files = coll.coll_metadata['total_files']
             else:
-                coll.total_files = coll_status[coll.coll_id]['total_files']
-            coll.processed_files = coll_status[coll.coll_id]['processed_files']
-            coll.processing_files = coll_status[coll.coll_id]['processing_files']
-            coll.bytes = coll_status[coll.coll_id]['bytes']
-            coll.new_files = coll_status[coll.coll_id]['new_files']
-            coll.failed_files = coll_status[coll.coll_id]['failed_files']
-            coll.missing_files = coll_status[coll.coll_id]['missing_files']
-            coll.ext_files = coll_status[coll.coll_id]['ext_files']
-            coll.processed_ext_files = coll_status[coll.coll_id]['processed_ext_files']
-            coll.failed_ext_files = coll_status[coll.coll_id]['failed_ext_files']
-            coll.missing_ext_files = coll_status[coll.coll_id]['missing_ext_files']
+                coll.total_files = stats['total_files']
+            coll.processed_files = stats['processed_files']
+            coll.processing_files = stats['processing_files']
+            coll.bytes = stats['bytes']
+            coll.new_files = stats['new_files']
+            coll.failed_files = stats['failed_files']
+            coll.missing_files = stats['missing_files']
+            coll.ext_files = stats['ext_files']
+            coll.processed_ext_files = stats['processed_ext_files']
+            coll.failed_ext_files = stats['failed_ext_files']
+            coll.missing_ext_files = stats['missing_ext_files']
         else:
             coll.total_files = 0
             coll.processed_files = 0
@@ -1995,6 +1874,17 @@ def sync_collection_status(request_id, transform_id, workload_id, work, input_ou
             coll.failed_ext_files = 0
             coll.missing_ext_files = 0
 
+    # fetch the db status of all fully monitored input collections in one query
+    input_coll_status = {}
+    if (not work.generating_new_inputs()) and (workload_id is not None):
+        closing_coll_ids = [coll.coll_id for coll in input_collections
+                            if coll.total_files == coll.processed_files + coll.failed_files + coll.missing_files]
+        if closing_coll_ids:
+            colls_db = core_catalog.get_collections(coll_id=closing_coll_ids)
+            input_coll_status = {coll_db['coll_id']: coll_db['status'] for coll_db in colls_db}
+
+    update_collections = []
+    for coll in all_collections:
         u_coll = {'coll_id': coll.coll_id,
                   'total_files': coll.total_files,
                   'processed_files': coll.processed_files,
@@ -2010,16 +1900,14 @@ def sync_collection_status(request_id, transform_id, workload_id, work, input_ou
 
         if (not work.generating_new_inputs()) and (coll in input_collections and (workload_id is not None)):
             if coll.total_files == coll.processed_files + coll.failed_files + coll.missing_files:
-                coll_db = core_catalog.get_collection(coll_id=coll.coll_id)
-                coll.status = coll_db['status']
+                coll.status = input_coll_status.get(coll.coll_id)
                 if coll.status is not None and coll.status != CollectionStatus.Closed:
                     u_coll['status'] = CollectionStatus.Closed
                     u_coll['substatus'] = CollectionStatus.Closed
                     coll.status = CollectionStatus.Closed
                     coll.substatus = CollectionStatus.Closed
 
-                    msgs = generate_messages(request_id, transform_id, workload_id, work, msg_type='collection', files=[coll], relation_type='input')
-                    messages += msgs
+                    messages.extend(generate_messages(request_id, transform_id, workload_id, work, msg_type='collection', files=[coll], relation_type='input'))
 
         if terminate:
             all_files_monitored = False
@@ -2062,7 +1950,7 @@ def sync_work_status(request_id, transform_id, workload_id, work, substatus=None
     is_all_files_processed = True
     is_all_files_failed = True
     has_files = False
-    for coll in input_collections + output_collections + log_collections:
+    for coll in itertools.chain(input_collections, output_collections, log_collections):
         if coll.status != CollectionStatus.Closed:
             is_all_collections_closed = False
     for coll in output_collections:
@@ -2107,21 +1995,18 @@ def sync_processing(processing, agent_attributes, terminate=False, abort=False,
     work = proc.work
     work.set_agent_attributes(agent_attributes, processing)
 
-    messages = []
     input_output_maps = get_input_output_maps(transform_id, work)
     if processing['substatus'] in terminated_status or processing['substatus'] in terminated_status:
         terminate = True
-    update_collections, all_updates_flushed, msgs = sync_collection_status(request_id, transform_id, workload_id, work,
-                                                                           input_output_maps=input_output_maps,
-                                                                           close_collection=True, abort=abort, terminate=terminate)
-
-    messages += msgs
+    # sync_collection_status returns a new list, the other messages are appended to it in place
+    update_collections, all_updates_flushed, messages = sync_collection_status(request_id, transform_id, workload_id, work,
+                                                                               input_output_maps=input_output_maps,
+                                                                               close_collection=True, abort=abort, terminate=terminate)
 
     sync_work_status(request_id, transform_id, workload_id, work, processing['substatus'], log_prefix)
     logger.info(log_prefix + "sync_processing: work status: %s" % work.get_status())
     if terminate and work.is_terminated():
-        msgs = generate_messages(request_id, transform_id, workload_id, work, msg_type='work')
-        messages += msgs
+        messages.extend(generate_messages(request_id, transform_id, workload_id, work, msg_type='work'))
         if work.is_finished():
             processing['status'] = ProcessingStatus.Finished
             # processing['status'] = processing['substatus']
@@ -2134,9 +2019,8 @@ def sync_processing(processing, agent_attributes, terminate=False, abort=False,
 
         if work.require_ext_contents():
             contents_ext = core_catalog.get_contents_ext(request_id=request_id, transform_id=transform_id)
-            msgs = generate_messages(request_id, transform_id, workload_id, work, msg_type='content_ext', files=contents_ext,
-                                     relation_type='output', input_output_maps=input_output_maps)
-            messages += msgs
+            messages.extend(generate_messages(request_id, transform_id, workload_id, work, msg_type='content_ext', files=contents_ext,
+                                              relation_type='output', input_output_maps=input_output_maps))
 
         if processing['status'] == ProcessingStatus.Terminating and is_process_terminated(processing['substatus']):
             processing['status'] = processing['substatus']
@@ -2179,14 +2063,13 @@ def handle_abort_processing(processing, agent_attributes, logger=None, log_prefi
 def reactive_contents(request_id, transform_id, workload_id, work, input_output_maps):
     updated_contents = []
     contents = core_catalog.get_contents_by_request_transform(request_id=request_id, transform_id=transform_id)
+    processed_status, new_status = PROCESSED_CONTENT_STATUS, ContentStatus.New
     for content in contents:
-        if content['status'] not in [ContentStatus.Available, ContentStatus.Mapped,
-                                     ContentStatus.Available.value, ContentStatus.Mapped.value,
-                                     ContentStatus.FakeAvailable, ContentStatus.FakeAvailable.value]:
+        if content['status'] not in processed_status:
             u_content = {'content_id': content['content_id'],
                          'request_id': content['request_id'],
-                         'substatus': ContentStatus.New,
-                         'status': ContentStatus.New}
+                         'substatus': new_status,
+                         'status': new_status}
             updated_contents.append(u_content)
     return updated_contents
 
@@ -2209,7 +2092,7 @@ def handle_resume_processing(processing, agent_attributes, logger=None, log_pref
     log_collections = work.get_log_collections()
 
     update_collections = []
-    for coll in input_collections + output_collections + log_collections:
+    for coll in itertools.chain(input_collections, output_collections, log_collections):
         coll.status = CollectionStatus.Open
         coll.substatus = CollectionStatus.Open
         u_collection = {'coll_id': coll.coll_id,
@@ -919,7 +919,7 @@ class Clerk(BaseAgent):
         return new_tf_ids, update_tf_ids
 
     def process_new_request(self, event):
-        self.number_workers += 1
+        self.add_worker()
         try:
             if event:
                 # req_status = [RequestStatus.New, RequestStatus.Extend, RequestStatus.Built]
@@ -948,7 +948,7 @@ class Clerk(BaseAgent):
         except Exception as ex:
             self.logger.error(ex)
             self.logger.error(traceback.format_exc())
-        self.number_workers -= 1
+        self.remove_worker()
 
     def handle_update_request_real(self, req, event):
         """
@@ -1263,7 +1263,7 @@ class Clerk(BaseAgent):
         return ret_req
 
     def process_update_request(self, event):
-        self.number_workers += 1
+        self.add_worker()
         pro_ret = ReturnCode.Ok.value
         try:
             if event:
@@ -1299,7 +1299,7 @@ class Clerk(BaseAgent):
             self.logger.error(ex)
             self.logger.error(traceback.format_exc())
             pro_ret = ReturnCode.Failed.value
-        self.number_workers -= 1
+        self.remove_worker()
         return pro_ret
 
     def handle_abort_request(self, req, event):
@@ -1363,7 +1363,7 @@ class Clerk(BaseAgent):
             core_commands.update_commands([u_command])
 
     def process_abort_request(self, event):
-        self.number_workers += 1
+        self.add_worker()
         pro_ret = ReturnCode.Ok.value
         try:
             if event:
@@ -1443,7 +1443,7 @@ class Clerk(BaseAgent):
             self.logger.error(ex)
             self.logger.error(traceback.format_exc())
             pro_ret = ReturnCode.Failed.value
-        self.number_workers -= 1
+        self.remove_worker()
         return pro_ret
 
     def handle_close_irequest(self, req, event):
@@ -1511,7 +1511,7 @@ class Clerk(BaseAgent):
         return ret_req
 
     def process_close_request(self, event):
-        self.number_workers += 1
+        self.add_worker()
         pro_ret = ReturnCode.Ok.value
         try:
             if event:
@@ -1553,7 +1553,7 @@ class Clerk(BaseAgent):
             self.logger.error(ex)
             self.logger.error(traceback.format_exc())
             pro_ret = ReturnCode.Failed.value
-        self.number_workers -= 1
+        self.remove_worker()
         return pro_ret
 
     def handle_resume_request(self, req):
@@ -1587,7 +1587,7 @@ class Clerk(BaseAgent):
         return ret_req
 
     def process_resume_request(self, event):
-        self.number_workers += 1
+        self.add_worker()
         pro_ret = ReturnCode.Ok.value
         try:
             if event:
@@ -1642,7 +1642,7 @@ class Clerk(BaseAgent):
             self.logger.error(ex)
             self.logger.error(traceback.format_exc())
             pro_ret = ReturnCode.Failed.value
-        self.number_workers -= 1
+        self.remove_worker()
         return pro_ret
 
     def clean_locks(self):
@@ -77,6 +77,10 @@ class BaseAgent(TimerScheduler, PluginBase):
             self.max_worker_exec_time = int(self.max_worker_exec_time)
         self.num_hang_workers, self.num_active_workers = 0, 0
 
+        # number_workers is updated from the worker threads, protect the read-modify-write.
+        self.number_workers = 0
+        self.number_workers_lock = threading.Lock()
+
         self.plugins = {}
         self.plugin_sequence = []
 
@@ -97,6 +101,14 @@ class BaseAgent(TimerScheduler, PluginBase):
         else:
             self.max_number_workers = int(self.max_number_workers)
 
+    def add_worker(self):
+        with self.number_workers_lock:
+            self.number_workers += 1
+
+    def remove_worker(self):
+        with self.number_workers_lock:
+            self.number_workers -= 1
+
     def get_event_bus(self):
         self.event_bus
 
@@ -187,10 +199,10 @@ class BaseAgent(TimerScheduler, PluginBase):
                     self.num_hang_workers += 1
 
         event_funcs = self.get_event_function_map()
-        for event_type in event_funcs:
-            exec_func = event_funcs[event_type]['exec_func']
-            # pre_check = event_funcs[event_type]['pre_check']
-            to_exec_at = event_funcs[event_type].get("to_exec_at", None)
+        for event_type, event_func in event_funcs.items():
+            exec_func = event_func['exec_func']
+            # pre_check = event_func['pre_check']
+            to_exec_at = event_func.get("to_exec_at", None)
             if to_exec_at is None or to_exec_at < time.time():
                 # if pre_check():
                 num_free_workers = self.executors.get_num_free_workers()
@@ -200,7 +212,7 @@ class BaseAgent(TimerScheduler, PluginBase):
                         for event in events:
                             future = self.executors.submit(exec_func, event)
                             self.event_futures[event._id] = (event, future, time.time())
-                event_funcs[event_type]["to_exec_at"] = time.time() + self.event_interval_delay
+                event_func["to_exec_at"] = time.time() + self.event_interval_delay
 
     def execute_schedules(self):
         # self.execute_timer_schedule()
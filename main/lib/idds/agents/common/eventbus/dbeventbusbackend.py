@@ -66,8 +66,8 @@ class DBEventBusBackend(BaseEventBusBackend):
         self.logger.info("add event: %s, ret: %s" % (event, ret))
 
     def send_bulk(self, events):
-        for event in events:
-            ret = core_events.add_event(event)
+        rets = core_events.add_events(events)
+        for event, ret in zip(events, rets):
             self.logger.info("add event: %s, ret: %s" % (event, ret))
 
     def get(self, event_type, num_events=1, wait=0):
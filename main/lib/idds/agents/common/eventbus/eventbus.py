@@ -119,7 +119,9 @@ class EventBus(Singleton):
         return self.publish_event(event)
 
     def send_bulk(self, events):
-        self.backend.send_bulk(events)
+        if not events:
+            return None
+        return self.backend.send_bulk(events)
 
     def send_report(self, event, status, start_time, end_time, source, result):
         return self.backend.send_report(event, status, start_time, end_time, source, result)
@@ -8,9 +8,10 @@
 # Authors:
 # - Wen Guan, <wen.guan@cern.ch>, 2019 - 2024
 
-import copy
-import datetime
+import collections
+import logging
 import random
+import threading
 import time
 import traceback
 
@@ -43,6 +44,17 @@ class Transformer(BaseAgent):
     Transformer works to process transforms.
     """
 
+    _NEW_STATES = (TransformStatus.New, TransformStatus.Ready, TransformStatus.Extend)
+    _RUNNING_STATES = (TransformStatus.Transforming,
+                       TransformStatus.ToCancel, TransformStatus.Cancelling,
+                       TransformStatus.ToSuspend, TransformStatus.Suspending,
+                       TransformStatus.ToExpire, TransformStatus.Expiring,
+                       TransformStatus.ToResume, TransformStatus.Resuming,
+                       TransformStatus.ToFinish, TransformStatus.ToForceFinish)
+    _TERMINATED_STATES = frozenset([TransformStatus.Finished, TransformStatus.SubFinished,
+                                    TransformStatus.Failed, TransformStatus.Cancelled,
+                                    TransformStatus.Suspended, TransformStatus.Expired])
+
     def __init__(self, num_threads=1, max_number_workers=8, poll_period=1800, retries=3, retrieve_bulk_size=10,
                  message_bulk_size=10000, **kwargs):
         self.max_number_workers = max_number_workers
@@ -78,6 +90,47 @@ class Transformer(BaseAgent):
         else:
             self.poll_period_increase_rate = 2
 
+        if hasattr(self, 'poll_period_jitter_rate'):
+            self.poll_period_jitter_rate = float(self.poll_period_jitter_rate)
+        else:
+            self.poll_period_jitter_rate = 0.1
+
+        # transforms are driven by events (NewTransformEvent from Clerk, UpdateTransformEvent from the
+        # carrier agents). Polling the database is a fallback, which backs off while there is nothing to do.
+        if hasattr(self, 'poll_transforms_delay'):
+            self.poll_transforms_delay = int(self.poll_transforms_delay)
+        else:
+            self.poll_transforms_delay = 10
+        if hasattr(self, 'max_poll_transforms_delay'):
+            self.max_poll_transforms_delay = int(self.max_poll_transforms_delay)
+        else:
+            self.max_poll_transforms_delay = 120
+        self.poll_transforms_task = None
+
+        # work_name_to_coll_map is the same for all transforms of a request,
+        # cache it for a short time to avoid reloading it for every update.
+        # It's always reloaded when a new processing is created.
+        if hasattr(self, 'work_name_to_coll_map_cache_ttl'):
+            self.work_name_to_coll_map_cache_ttl = int(self.work_name_to_coll_map_cache_ttl)
+        else:
+            self.work_name_to_coll_map_cache_ttl = 30
+        self.work_name_to_coll_map_cache = {}
+        self.work_name_to_coll_map_cache_lock = threading.Lock()
+
+        # finished transforms never change status again (resume skips them),
+        # remember them to answer abort/resume commands without locking the row.
+        if hasattr(self, 'finished_transforms_cache_size'):
+            self.finished_transforms_cache_size = int(self.finished_transforms_cache_size)
+        else:
+            self.finished_transforms_cache_size = 10000
+        self.finished_transforms_cache = collections.OrderedDict()
+        self.finished_transforms_cache_lock = threading.Lock()
+
+        if hasattr(self, 'max_deadlock_requeues'):
+            self.max_deadlock_requeues = int(self.max_deadlock_requeues)
+        else:
+            self.max_deadlock_requeues = 3
+
         if hasattr(self, 'max_new_poll_period'):
             self.max_new_poll_period = int(self.max_new_poll_period)
         else:
@@ -106,12 +159,14 @@ class Transformer(BaseAgent):
             q_str = "number of transforms: %s, max number of transforms: %s" % (self.number_workers, self.max_number_workers)
             self.logger.debug(q_str)
 
-    def get_new_transforms(self):
+    def get_new_and_running_transforms(self):
         """
-        Get new transforms to process
+        Get new and running transforms to process in one database transaction
         """
         try:
             if not self.is_ok_to_run_more_transforms():
+                # the workers are busy, poll again at the base delay
+                self.adjust_poll_transforms_delay(has_transforms=True)
                 return []
 
             self.show_queue_size()
@@ -119,79 +174,48 @@ class Transformer(BaseAgent):
             if BaseAgent.min_request_id is None:
                 return []
 
-            transform_status = [TransformStatus.New, TransformStatus.Ready, TransformStatus.Extend]
-            # next_poll_at = datetime.datetime.utcnow() + datetime.timedelta(seconds=self.poll_period)
-            transforms_new = core_transforms.get_transforms_by_status(status=transform_status, locking=True,
-                                                                      not_lock=True,
-                                                                      new_poll=True, only_return_id=True,
-                                                                      min_request_id=BaseAgent.min_request_id,
-                                                                      bulk_size=self.retrieve_bulk_size)
+            status_groups = {'new': {'status': self._NEW_STATES, 'new_poll': True},
+                             'running': {'status': self._RUNNING_STATES, 'update_poll': True}}
+            transforms = core_transforms.get_transforms_by_status_groups(status_groups=status_groups,
+                                                                         locking=True,
+                                                                         not_lock=True,
+                                                                         min_request_id=BaseAgent.min_request_id,
+                                                                         bulk_size=self.retrieve_bulk_size)
+            transforms_new, transforms_running = transforms['new'], transforms['running']
 
-            # self.logger.debug("Main thread get %s New+Ready+Extend transforms to process" % len(transforms_new))
             if transforms_new:
                 self.logger.info("Main thread get New+Ready+Extend transforms to process: %s" % str(transforms_new))
+            if transforms_running:
+                self.logger.info("Main thread get transforming transforms to process: %s" % str(transforms_running))
 
-            events = []
-            for tf_id in transforms_new:
-                event = NewTransformEvent(publisher_id=self.id, transform_id=tf_id)
-                events.append(event)
+            events = [NewTransformEvent(publisher_id=self.id, transform_id=tf_id) for tf_id in transforms_new]
+            events += [UpdateTransformEvent(publisher_id=self.id, transform_id=tf_id) for tf_id in transforms_running]
             self.event_bus.send_bulk(events)
 
-            return transforms_new
+            full_batch = (len(transforms_new) >= self.retrieve_bulk_size or len(transforms_running) >= self.retrieve_bulk_size)
+            self.adjust_poll_transforms_delay(has_transforms=bool(events), full_batch=full_batch)
+            return transforms_new + transforms_running
         except exceptions.DatabaseException as ex:
             if 'ORA-00060' in str(ex):
                 self.logger.warn("(cx_Oracle.DatabaseError) ORA-00060: deadlock detected while waiting for resource")
             else:
-                # raise ex
                 self.logger.error(ex)
                 self.logger.error(traceback.format_exc())
         return []
 
-    def get_running_transforms(self):
+    def adjust_poll_transforms_delay(self, has_transforms, full_batch=False):
         """
-        Get running transforms
+        Poll again immediately when a full batch was found, at the base delay when some transforms were found,
+        otherwise double the delay up to max_poll_transforms_delay.
         """
-        try:
-            if not self.is_ok_to_run_more_transforms():
-                return []
-
-            self.show_queue_size()
-
-            if BaseAgent.min_request_id is None:
-                return []
-
-            transform_status = [TransformStatus.Transforming,
-                                TransformStatus.ToCancel, TransformStatus.Cancelling,
-                                TransformStatus.ToSuspend, TransformStatus.Suspending,
-                                TransformStatus.ToExpire, TransformStatus.Expiring,
-                                TransformStatus.ToResume, TransformStatus.Resuming,
-                                TransformStatus.ToFinish, TransformStatus.ToForceFinish]
-            transforms = core_transforms.get_transforms_by_status(status=transform_status,
-                                                                  period=None,
-                                                                  locking=True,
-                                                                  not_lock=True,
-                                                                  min_request_id=BaseAgent.min_request_id,
-                                                                  update_poll=True, only_return_id=True,
-                                                                  bulk_size=self.retrieve_bulk_size)
-
-            # self.logger.debug("Main thread get %s transforming transforms to process" % len(transforms))
-            if transforms:
-                self.logger.info("Main thread get transforming transforms to process: %s" % str(transforms))
-
-            events = []
-            for tf_id in transforms:
-                event = UpdateTransformEvent(publisher_id=self.id, transform_id=tf_id)
-                events.append(event)
-            self.event_bus.send_bulk(events)
-
-            return transforms
-        except exceptions.DatabaseException as ex:
-            if 'ORA-00060' in str(ex):
-                self.logger.warn("(cx_Oracle.DatabaseError) ORA-00060: deadlock detected while waiting for resource")
-            else:
-                self.logger.error(ex)
-                self.logger.error(traceback.format_exc())
-        return []
+        if self.poll_transforms_task is None:
+            return
+        if full_batch:
+            self.poll_transforms_task.delay_time = 0
+        elif has_transforms or self.poll_transforms_task.delay_time < self.poll_transforms_delay:
+            self.poll_transforms_task.delay_time = self.poll_transforms_delay
+        else:
+            self.poll_transforms_task.delay_time = min(self.poll_transforms_task.delay_time * 2, self.max_poll_transforms_delay)
 
     def get_transform(self, transform_id, status=None, locking=False):
         try:
@@ -205,29 +229,67 @@ class Transformer(BaseAgent):
                 self.logger.error(traceback.format_exc())
         return None
 
+    def get_poll_period_with_jitter(self, poll_period):
+        """
+        Spread the poll period by +/- poll_period_jitter_rate, so that transforms
+        updated in the same bulk are not polled again all at the same time.
+        """
+        jitter = random.uniform(-self.poll_period_jitter_rate, self.poll_period_jitter_rate)
+        return max(1, int(poll_period * (1 + jitter)))
+
     def load_poll_period(self, transform, parameters):
         if self.new_poll_period and transform['new_poll_period'] != self.new_poll_period:
-            parameters['new_poll_period'] = self.new_poll_period
+            parameters['new_poll_period'] = self.get_poll_period_with_jitter(self.new_poll_period)
         if self.update_poll_period and transform['update_poll_period'] != self.update_poll_period:
-            parameters['update_poll_period'] = self.update_poll_period
+            parameters['update_poll_period'] = self.get_poll_period_with_jitter(self.update_poll_period)
         return parameters
 
     def generate_processing_model(self, transform):
-        new_processing_model = {}
-        new_processing_model['transform_id'] = transform['transform_id']
-        new_processing_model['request_id'] = transform['request_id']
-        new_processing_model['workload_id'] = transform['workload_id']
-        new_processing_model['status'] = ProcessingStatus.New
-        # new_processing_model['expired_at'] = work.get_expired_at(None)
-        new_processing_model['expired_at'] = transform['expired_at']
-
-        new_processing_model['processing_type'] = get_processing_type_from_transform_type(transform['transform_type'])
-        new_processing_model['new_poll_period'] = transform['new_poll_period']
-        new_processing_model['update_poll_period'] = transform['update_poll_period']
-        new_processing_model['max_new_retries'] = transform['max_new_retries']
-        new_processing_model['max_update_retries'] = transform['max_update_retries']
+        # 'expired_at': work.get_expired_at(None)
+        new_processing_model = {'transform_id': transform['transform_id'],
+                                'request_id': transform['request_id'],
+                                'workload_id': transform['workload_id'],
+                                'status': ProcessingStatus.New,
+                                'expired_at': transform['expired_at'],
+                                'processing_type': get_processing_type_from_transform_type(transform['transform_type']),
+                                'new_poll_period': transform['new_poll_period'],
+                                'update_poll_period': transform['update_poll_period'],
+                                'max_new_retries': transform['max_new_retries'],
+                                'max_update_retries': transform['max_update_retries']}
         return new_processing_model
 
+    def get_work_name_to_coll_map(self, request_id, refresh=False):
+        """
+        Get the work_name_to_coll_map of a request, from the cache if it's not expired.
+        """
+        now = time.time()
+        if not refresh and self.work_name_to_coll_map_cache_ttl > 0:
+            with self.work_name_to_coll_map_cache_lock:
+                cached = self.work_name_to_coll_map_cache.get(request_id)
+            if cached and cached[0] > now:
+                return cached[1]
+
+        work_name_to_coll_map = core_transforms.get_work_name_to_coll_map(request_id=request_id)
+        if self.work_name_to_coll_map_cache_ttl > 0:
+            with self.work_name_to_coll_map_cache_lock:
+                for key in [key for key, item in self.work_name_to_coll_map_cache.items() if item[0] <= now]:
+                    del self.work_name_to_coll_map_cache[key]
+                self.work_name_to_coll_map_cache[request_id] = (now + self.work_name_to_coll_map_cache_ttl, work_name_to_coll_map)
+        return work_name_to_coll_map
+
+    def add_finished_transform(self, transform_id):
+        if self.finished_transforms_cache_size <= 0:
+            return
+        with self.finished_transforms_cache_lock:
+            self.finished_transforms_cache[transform_id] = None
+            self.finished_transforms_cache.move_to_end(transform_id)
+            while len(self.finished_transforms_cache) > self.finished_transforms_cache_size:
+                self.finished_transforms_cache.popitem(last=False)
+
+    def is_finished_transform(self, transform_id):
+        with self.finished_transforms_cache_lock:
+            return transform_id in self.finished_transforms_cache
+
     def get_log_prefix(self, transform):
         if transform:
             return "<request_id=%s,transform_id=%s>" % (transform['request_id'], transform['transform_id'])
@@ -245,7 +307,8 @@ class Transformer(BaseAgent):
         work.set_work_id(transform['transform_id'])
         work.set_agent_attributes(self.agent_attributes, transform)
 
-        work_name_to_coll_map = core_transforms.get_work_name_to_coll_map(request_id=transform['request_id'])
+        # new transforms can add collections to the request, always reload the map here.
+        work_name_to_coll_map = self.get_work_name_to_coll_map(request_id=transform['request_id'], refresh=True)
         work.set_work_name_to_coll_map(work_name_to_coll_map)
 
         # create processing
@@ -255,8 +318,7 @@ class Transformer(BaseAgent):
         if processing and not processing.processing_id:
             new_processing_model = self.generate_processing_model(transform)
 
-            proc_work = copy.deepcopy(work)
-            proc_work.clean_work()
+            proc_work = work.clone_for_processing()
             processing.work = proc_work
             new_processing_model['processing_metadata'] = {'processing': processing}
 
@@ -268,14 +330,9 @@ class Transformer(BaseAgent):
         transform_parameters = self.load_poll_period(transform, transform_parameters)
 
         if new_processing_model is not None:
-            if 'new_poll_period' in transform_parameters:
-                new_processing_model['new_poll_period'] = transform_parameters['new_poll_period']
-            if 'update_poll_period' in transform_parameters:
-                new_processing_model['update_poll_period'] = transform_parameters['update_poll_period']
-            if 'max_new_retries' in transform_parameters:
-                new_processing_model['max_new_retries'] = transform_parameters['max_new_retries']
-            if 'max_update_retries' in transform_parameters:
-                new_processing_model['max_update_retries'] = transform_parameters['max_update_retries']
+            for key in ('new_poll_period', 'update_poll_period', 'max_new_retries', 'max_update_retries'):
+                if key in transform_parameters:
+                    new_processing_model[key] = transform_parameters[key]
 
         ret = {'transform': transform,
                'transform_parameters': transform_parameters,
@@ -357,14 +414,9 @@ class Transformer(BaseAgent):
         transform_parameters = self.load_poll_period(transform, transform_parameters)
 
         if new_processing_model is not None:
-            if 'new_poll_period' in transform_parameters:
-                new_processing_model['new_poll_period'] = transform_parameters['new_poll_period']
-            if 'update_poll_period' in transform_parameters:
-                new_processing_model['update_poll_period'] = transform_parameters['update_poll_period']
-            if 'max_new_retries' in transform_parameters:
-                new_processing_model['max_new_retries'] = transform_parameters['max_new_retries']
-            if 'max_update_retries' in transform_parameters:
-                new_processing_model['max_update_retries'] = transform_parameters['max_update_retries']
+            for key in ('new_poll_period', 'update_poll_period', 'max_new_retries', 'max_update_retries'):
+                if key in transform_parameters:
+                    new_processing_model[key] = transform_parameters[key]
 
         func_name = work.get_func_name()
         func_name = func_name.split(':')[-1]
@@ -416,15 +468,31 @@ class Transformer(BaseAgent):
             self.logger.info(log_pre + "handle_new_itransform exception result: %s" % str(ret))
         return ret
 
-    def update_transform(self, ret):
+    def release_transform_lock(self, transform):
+        """
+        Release the transform lock.
+        """
+        log_pre = self.get_log_prefix(transform)
+        self.logger.info(log_pre + "Release transform lock")
+        core_transforms.update_transform(transform_id=transform['transform_id'],
+                                         parameters={'locking': TransformLocking.Idle})
+
+    def update_transform(self, ret, event=None):
+        """
+        Update the transform and its outputs.
+
+        If the event is provided, a deadlock is not retried by sleeping in the worker. The transform
+        lock is released and None, None is returned (up to max_deadlock_requeues times), then the
+        caller returns ReturnCode.Locked to let BaseAgent requeue the event.
+        """
         new_pr_ids, update_pr_ids = [], []
         try:
             if ret:
                 log_pre = self.get_log_prefix(ret['transform'])
                 self.logger.info(log_pre + "Update transform: %s" % str(ret))
 
+                # updated_at is set by orm update_transform when the transform is written
                 ret['transform_parameters']['locking'] = TransformLocking.Idle
-                ret['transform_parameters']['updated_at'] = datetime.datetime.utcnow()
 
                 retry = True
                 retry_num = 0
@@ -448,18 +516,21 @@ class Transformer(BaseAgent):
                                                                                           new_processing=ret.get('new_processing', None),
                                                                                           update_processing=ret.get('update_processing', None),
                                                                                           message_bulk_size=self.message_bulk_size)
+                        if ret['transform_parameters'].get('status') == TransformStatus.Finished:
+                            self.add_finished_transform(ret['transform']['transform_id'])
                     except exceptions.DatabaseException as ex:
                         if 'ORA-00060' in str(ex):
                             self.logger.warn("(cx_Oracle.DatabaseError) ORA-00060: deadlock detected while waiting for resource")
-                            if retry_num < 5:
+                            if event is not None and event.get_requeue_counter() < self.max_deadlock_requeues:
+                                self.release_transform_lock(ret['transform'])
+                                return None, None
+                            elif retry_num < 5 and not self.graceful_stop.is_set():
                                 retry = True
-                                if retry_num <= 1:
-                                    random_sleep = random.randint(1, 10)
-                                elif retry_num <= 2:
-                                    random_sleep = random.randint(1, 60)
-                                else:
-                                    random_sleep = random.randint(1, 120)
-                                time.sleep(random_sleep)
+                                # exponential backoff with jitter: 0.5, 1, 2, 4 seconds (capped at 8).
+                                # wait on graceful_stop, so that stopping the agent interrupts the backoff.
+                                random_sleep = min(8, 0.5 * (2 ** (retry_num - 1))) + random.uniform(0, 0.25)
+                                if self.graceful_stop.wait(random_sleep):
+                                    raise ex
                             else:
                                 raise ex
                         else:
@@ -472,12 +543,10 @@ class Transformer(BaseAgent):
             try:
                 transform_parameters = {'status': TransformStatus.Transforming,
                                         'locking': TransformLocking.Idle}
-                if 'new_retries' in ret['transform_parameters']:
-                    transform_parameters['new_retries'] = ret['transform_parameters']['new_retries']
-                if 'update_retries' in ret['transform_parameters']:
-                    transform_parameters['update_retries'] = ret['transform_parameters']['update_retries']
-                if 'errors' in ret['transform_parameters']:
-                    transform_parameters['errors'] = ret['transform_parameters']['errors']
+                ret_transform_parameters = ret['transform_parameters']
+                for key in ('new_retries', 'update_retries', 'errors'):
+                    if key in ret_transform_parameters:
+                        transform_parameters[key] = ret_transform_parameters[key]
 
                 log_pre = self.get_log_prefix(ret['transform'])
                 self.logger.warn(log_pre + "update transform exception result: %s" % str(transform_parameters))
@@ -490,11 +559,11 @@ class Transformer(BaseAgent):
         return new_pr_ids, update_pr_ids
 
     def process_new_transform(self, event):
-        self.number_workers += 1
+        self.add_worker()
+        pro_ret = ReturnCode.Ok.value
         try:
             if event:
-                tf_status = [TransformStatus.New, TransformStatus.Ready, TransformStatus.Extend]
-                tf = self.get_transform(transform_id=event._transform_id, status=tf_status, locking=True)
+                tf = self.get_transform(transform_id=event._transform_id, status=self._NEW_STATES, locking=True)
                 if not tf:
                     self.logger.error("Cannot find transform for event: %s" % str(event))
                 else:
@@ -506,19 +575,37 @@ class Transformer(BaseAgent):
                         ret = self.handle_new_transform(tf)
                     self.logger.info(log_pre + "process_new_transform result: %s" % str(ret))
 
-                    new_pr_ids, update_pr_ids = self.update_transform(ret)
-                    for pr_id in new_pr_ids:
-                        self.logger.info(log_pre + "NewProcessingEvent(processing_id: %s)" % pr_id)
-                        event = NewProcessingEvent(publisher_id=self.id, processing_id=pr_id, content=event._content)
-                        self.event_bus.send(event)
-                    for pr_id in update_pr_ids:
-                        self.logger.info(log_pre + "UpdateProcessingEvent(processing_id: %s)" % pr_id)
-                        event = UpdateProcessingEvent(publisher_id=self.id, processing_id=pr_id, content=event._content)
-                        self.event_bus.send(event)
+                    new_pr_ids, update_pr_ids = self.update_transform(ret, event=event)
+                    if new_pr_ids is None:
+                        # deadlock, the update is rolled back. BaseAgent will requeue the event.
+                        pro_ret = ReturnCode.Locked.value
+                    else:
+                        if new_pr_ids:
+                            self.logger.info(log_pre + "NewProcessingEvent(processing_ids: %s)" % str(new_pr_ids))
+                        if update_pr_ids:
+                            self.logger.info(log_pre + "UpdateProcessingEvent(processing_ids: %s)" % str(update_pr_ids))
+                        content = event._content
+                        events = [NewProcessingEvent(publisher_id=self.id, processing_id=pr_id, content=content) for pr_id in new_pr_ids]
+                        events.extend(UpdateProcessingEvent(publisher_id=self.id, processing_id=pr_id, content=content) for pr_id in update_pr_ids)
+                        self.event_bus.send_bulk(events)
         except Exception as ex:
             self.logger.error(ex)
             self.logger.error(traceback.format_exc())
-        self.number_workers -= 1
+            pro_ret = ReturnCode.Failed.value
+        self.remove_worker()
+        return pro_ret
+
+    def get_terminated_transform_status(self, work, to_abort=False):
+        """
+        Map a terminated work to the final transform status.
+        """
+        if work.is_finished():
+            return TransformStatus.Finished
+        if to_abort:
+            return TransformStatus.Cancelled
+        if work.is_subfinished():
+            return TransformStatus.SubFinished
+        return TransformStatus.Failed
 
     def handle_update_transform_real(self, transform, event):
         """
@@ -526,20 +613,20 @@ class Transformer(BaseAgent):
         """
         log_pre = self.get_log_prefix(transform)
 
-        self.logger.info(log_pre + "handle_update_transform: transform_id: %s" % transform['transform_id'])
+        self.logger.info(log_pre + "handle_update_transform: transform_id: %s", transform['transform_id'])
 
         is_terminated = False
         to_abort = False
         if (event and event._content and 'cmd_type' in event._content and event._content['cmd_type']
             and event._content['cmd_type'] in [CommandType.AbortRequest, CommandType.ExpireRequest]):      # noqa W503
             to_abort = True
-            self.logger.info(log_pre + "to_abort %s" % to_abort)
+            self.logger.info(log_pre + "to_abort %s", to_abort)
 
         work = transform['transform_metadata']['work']
         work.set_work_id(transform['transform_id'])
         work.set_agent_attributes(self.agent_attributes, transform)
 
-        work_name_to_coll_map = core_transforms.get_work_name_to_coll_map(request_id=transform['request_id'])
+        work_name_to_coll_map = self.get_work_name_to_coll_map(request_id=transform['request_id'])
         work.set_work_name_to_coll_map(work_name_to_coll_map)
 
         # link processings
@@ -547,7 +634,8 @@ class Transformer(BaseAgent):
         ret_processing_id = None
 
         processing = work.get_processing(input_output_maps=[], without_creating=True)
-        self.logger.debug(log_pre + "work get_processing: %s" % processing)
+        if self.logger.isEnabledFor(logging.DEBUG):
+            self.logger.debug(log_pre + "work get_processing: %s", processing)
         if processing and processing.processing_id:
             ret_processing_id = processing.processing_id
             processing_model = core_processings.get_processing(processing_id=processing.processing_id)
@@ -564,29 +652,22 @@ class Transformer(BaseAgent):
         else:
             if not processing:
                 processing = work.get_processing(input_output_maps=[], without_creating=False)
-                self.logger.debug(log_pre + "work get_processing with creating: %s" % processing)
+                if self.logger.isEnabledFor(logging.DEBUG):
+                    self.logger.debug(log_pre + "work get_processing with creating: %s", processing)
             new_processing_model = self.generate_processing_model(transform)
 
-            proc_work = copy.deepcopy(work)
-            proc_work.clean_work()
+            # the processing work keeps the map, don't build it from a cached map which can be stale.
+            work_name_to_coll_map = self.get_work_name_to_coll_map(request_id=transform['request_id'], refresh=True)
+            work.set_work_name_to_coll_map(work_name_to_coll_map)
+            proc_work = work.clone_for_processing()
             processing.work = proc_work
             new_processing_model['processing_metadata'] = {'processing': processing}
 
-        self.logger.info(log_pre + "syn_work_status: %s, transform status: %s" % (transform['transform_id'], transform['status']))
+        self.logger.info(log_pre + "syn_work_status: %s, transform status: %s", transform['transform_id'], transform['status'])
         if work.is_terminated():
             is_terminated = True
-            self.logger.info(log_pre + "Transform(%s) work is terminated: work status: %s" % (transform['transform_id'], work.get_status()))
-            if work.is_finished():
-                transform['status'] = TransformStatus.Finished
-            else:
-                if to_abort:
-                    transform['status'] = TransformStatus.Cancelled
-                elif work.is_subfinished():
-                    transform['status'] = TransformStatus.SubFinished
-                elif work.is_failed():
-                    transform['status'] = TransformStatus.Failed
-                else:
-                    transform['status'] = TransformStatus.Failed
+            self.logger.info(log_pre + "Transform(%s) work is terminated: work status: %s", transform['transform_id'], work.get_status())
+            transform['status'] = self.get_terminated_transform_status(work, to_abort=to_abort)
 
         transform_parameters = {'status': transform['status'],
                                 'locking': TransformLocking.Idle,
@@ -595,14 +676,9 @@ class Transformer(BaseAgent):
         transform_parameters = self.load_poll_period(transform, transform_parameters)
 
         if new_processing_model is not None:
-            if 'new_poll_period' in transform_parameters:
-                new_processing_model['new_poll_period'] = transform_parameters['new_poll_period']
-            if 'update_poll_period' in transform_parameters:
-                new_processing_model['update_poll_period'] = transform_parameters['update_poll_period']
-            if 'max_new_retries' in transform_parameters:
-                new_processing_model['max_new_retries'] = transform_parameters['max_new_retries']
-            if 'max_update_retries' in transform_parameters:
-                new_processing_model['max_update_retries'] = transform_parameters['max_update_retries']
+            for key in ('new_poll_period', 'update_poll_period', 'max_new_retries', 'max_update_retries'):
+                if key in transform_parameters:
+                    new_processing_model[key] = transform_parameters[key]
 
         ret = {'transform': transform,
                'transform_parameters': transform_parameters,
@@ -678,8 +754,7 @@ class Transformer(BaseAgent):
             errors = {'submit_err': 'no attached processings'}
 
         is_terminated = False
-        if transform['status'] in [TransformStatus.Finished, TransformStatus.Failed, TransformStatus.Cancelled,
-                                   TransformStatus.SubFinished, TransformStatus.Suspended, TransformStatus.Expired]:
+        if transform['status'] in self._TERMINATED_STATES:
             is_terminated = True
 
         transform_parameters = {'status': transform['status'],
@@ -732,7 +807,7 @@ class Transformer(BaseAgent):
         return ret, False, None
 
     def process_update_transform(self, event):
-        self.number_workers += 1
+        self.add_worker()
         pro_ret = ReturnCode.Ok.value
         try:
             if event:
@@ -754,29 +829,32 @@ class Transformer(BaseAgent):
                         ret, is_terminated, ret_processing_id = self.handle_update_itransform(tf, event)
                     else:
                         ret, is_terminated, ret_processing_id = self.handle_update_transform(tf, event)
-                    new_pr_ids, update_pr_ids = self.update_transform(ret)
-
-                    if is_terminated or (event._content and 'event' in event._content and event._content['event'] == 'submitted'):
-                        self.logger.info(log_pre + "UpdateRequestEvent(request_id: %s)" % tf['request_id'])
-                        event = UpdateRequestEvent(publisher_id=self.id, request_id=tf['request_id'], content=event._content)
-                        self.event_bus.send(event)
-                    for pr_id in new_pr_ids:
-                        self.logger.info(log_pre + "NewProcessingEvent(processing_id: %s)" % pr_id)
-                        event = NewProcessingEvent(publisher_id=self.id, processing_id=pr_id, content=event._content)
-                        self.event_bus.send(event)
-                    for pr_id in update_pr_ids:
-                        self.logger.info(log_pre + "UpdateProcessingEvent(processing_id: %s)" % pr_id)
-                        event = UpdateProcessingEvent(publisher_id=self.id, processing_id=pr_id, content=event._content)
-                        self.event_bus.send(event)
-                    if ret_processing_id and (event._content and 'event' in event._content and event._content['event'] == 'Trigger'):
-                        self.logger.info(log_pre + "UpdateProcessingEvent(processing_id: %s)" % ret_processing_id)
-                        event = UpdateProcessingEvent(publisher_id=self.id, processing_id=ret_processing_id)
-                        self.event_bus.send(event)
+                    new_pr_ids, update_pr_ids = self.update_transform(ret, event=event)
+                    if new_pr_ids is None:
+                        # deadlock, the update is rolled back. BaseAgent will requeue the event.
+                        pro_ret = ReturnCode.Locked.value
+                    else:
+                        content = event._content
+                        content_event = content.get('event', None) if content else None
+                        events = []
+                        if is_terminated or content_event == 'submitted':
+                            self.logger.info(log_pre + "UpdateRequestEvent(request_id: %s)" % tf['request_id'])
+                            events.append(UpdateRequestEvent(publisher_id=self.id, request_id=tf['request_id'], content=content))
+                        if new_pr_ids:
+                            self.logger.info(log_pre + "NewProcessingEvent(processing_ids: %s)" % str(new_pr_ids))
+                            events.extend(NewProcessingEvent(publisher_id=self.id, processing_id=pr_id, content=content) for pr_id in new_pr_ids)
+                        if update_pr_ids:
+                            self.logger.info(log_pre + "UpdateProcessingEvent(processing_ids: %s)" % str(update_pr_ids))
+                            events.extend(UpdateProcessingEvent(publisher_id=self.id, processing_id=pr_id, content=content) for pr_id in update_pr_ids)
+                        if ret_processing_id and content_event == 'Trigger':
+                            self.logger.info(log_pre + "UpdateProcessingEvent(processing_id: %s)" % ret_processing_id)
+                            events.append(UpdateProcessingEvent(publisher_id=self.id, processing_id=ret_processing_id))
+                        self.event_bus.send_bulk(events)
         except Exception as ex:
             self.logger.error(ex)
             self.logger.error(traceback.format_exc())
             pro_ret = ReturnCode.Failed.value
-        self.number_workers -= 1
+        self.remove_worker()
         return pro_ret
 
     def handle_abort_transform(self, transform):
@@ -815,10 +893,12 @@ class Transformer(BaseAgent):
         return None
 
     def process_abort_transform(self, event):
-        self.number_workers += 1
+        self.add_worker()
         pro_ret = ReturnCode.Ok.value
         try:
-            if event:
+            if event and self.is_finished_transform(event._transform_id):
+                self.logger.info("process_abort_transform: event: %s, transform is already finished. Cannot be aborted" % event)
+            elif event:
                 self.logger.info("process_abort_transform: event: %s" % event)
                 tf = self.get_transform(transform_id=event._transform_id, locking=True)
                 if not tf:
@@ -828,9 +908,9 @@ class Transformer(BaseAgent):
                     log_pre = self.get_log_prefix(tf)
                     self.logger.info(log_pre + "process_abort_transform")
 
-                    if tf['status'] in [TransformStatus.Finished, TransformStatus.SubFinished,
-                                        TransformStatus.Failed, TransformStatus.Cancelled,
-                                        TransformStatus.Suspended, TransformStatus.Expired]:
+                    if tf['status'] in self._TERMINATED_STATES:
+                        if tf['status'] == TransformStatus.Finished:
+                            self.add_finished_transform(tf['transform_id'])
                         ret = {'transform': tf,
                                'transform_parameters': {'locking': TransformLocking.Idle,
                                                         'errors': {'extra_msg': "Transform is already terminated. Cannot be aborted"}}}
@@ -859,7 +939,7 @@ class Transformer(BaseAgent):
             self.logger.error(ex)
             self.logger.error(traceback.format_exc())
             pro_ret = ReturnCode.Failed.value
-        self.number_workers -= 1
+        self.remove_worker()
         return pro_ret
 
     def handle_resume_transform(self, transform):
@@ -891,10 +971,12 @@ class Transformer(BaseAgent):
         return None
 
     def process_resume_transform(self, event):
-        self.number_workers += 1
+        self.add_worker()
         pro_ret = ReturnCode.Ok.value
         try:
-            if event:
+            if event and self.is_finished_transform(event._transform_id):
+                self.logger.info("process_resume_transform: event: %s, transform is already finished. Cannot be resumed" % event)
+            elif event:
                 self.logger.info("process_resume_transform: event: %s" % event)
                 tf = self.get_transform(transform_id=event._transform_id, locking=True)
                 if not tf:
@@ -903,7 +985,8 @@ class Transformer(BaseAgent):
                 else:
                     log_pre = self.get_log_prefix(tf)
 
-                    if tf['status'] in [TransformStatus.Finished]:
+                    if tf['status'] == TransformStatus.Finished:
+                        self.add_finished_transform(tf['transform_id'])
                         ret = {'transform': tf,
                                'transform_parameters': {'locking': TransformLocking.Idle,
                                                         'errors': {'extra_msg': "Transform is already finished. Cannot be resumed"}}}
@@ -938,7 +1021,7 @@ class Transformer(BaseAgent):
             self.logger.error(ex)
             self.logger.error(traceback.format_exc())
             pro_ret = ReturnCode.Failed.value
-        self.number_workers -= 1
+        self.remove_worker()
         return pro_ret
 
     def clean_locks(self):
@@ -979,9 +1062,8 @@ class Transformer(BaseAgent):
 
             self.init_event_function_map()
 
-            task = self.create_task(task_func=self.get_new_transforms, task_output_queue=None, task_args=tuple(), task_kwargs={}, delay_time=10, priority=1)
-            self.add_task(task)
-            task = self.create_task(task_func=self.get_running_transforms, task_output_queue=None, task_args=tuple(), task_kwargs={}, delay_time=10, priority=1)
+            task = self.create_task(task_func=self.get_new_and_running_transforms, task_output_queue=None, task_args=tuple(), task_kwargs={}, delay_time=self.poll_transforms_delay, priority=1)
+            self.poll_transforms_task = task
             self.add_task(task)
             task = self.create_task(task_func=self.clean_locks, task_output_queue=None, task_args=tuple(), task_kwargs={}, delay_time=1800, priority=1)
             self.add_task(task)
@@ -215,13 +215,15 @@ class Transporter(BaseAgent):
         return self.plugins['contents_register'](scope, name, contents)
 
     def is_input_collection_all_processed(self, coll_id_list):
-        is_all_processed = True
-        for coll_id in coll_id_list:
-            coll = core_catalog.get_collection(coll_id)
+        if not coll_id_list:
+            return True
+        colls = core_catalog.get_collections(coll_id=coll_id_list)
+        if len(colls) < len(set(coll_id_list)):
+            return False
+        for coll in colls:
             if not (coll['status'] == CollectionStatus.Closed and coll['total_files'] == coll['processed_files']):
-                is_all_processed = False
-                return is_all_processed
-        return is_all_processed
+                return False
+        return True
 
     def is_all_processings_finished(self, transform_id):
         last_processing = None
@@ -55,7 +55,7 @@ def get_collections_by_status(status, relation_type=CollectionRelationType.Input
 
 @read_session
 def get_collections(scope=None, name=None, request_id=None, workload_id=None, transform_id=None,
-                    relation_type=None, to_json=False, session=None):
+                    relation_type=None, coll_id=None, to_json=False, session=None):
     """
     Get collections by scope, name, request_id and workload id.
 
@@ -66,6 +66,7 @@ def get_collections(scope=None, name=None, request_id=None, workload_id=None, tr
     :param transform_id: The transform id related to this collection.
     :param relation_type: The relation between this collection and its transform,
                           such as Input, Output, Log and so on.
+    :param coll_id: list of collection ids.
     :param to_json: return json format.
     :param session: The database session in use.
 
@@ -73,7 +74,7 @@ def get_collections(scope=None, name=None, request_id=None, workload_id=None, tr
     """
     collections = orm_collections.get_collections(scope=scope, name=name, request_id=request_id,
                                                   workload_id=workload_id, transform_id=transform_id,
-                                                  to_json=to_json,
+                                                  coll_id=coll_id, to_json=to_json,
                                                   relation_type=relation_type, session=session)
     return collections
 
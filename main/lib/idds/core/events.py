@@ -28,6 +28,19 @@ def add_event(event, session=None):
     return orm_events.add_event(event=event, session=session)
 
 
+@transactional_session
+def add_events(events, session=None):
+    """
+    Add a list of events in one transaction.
+
+    :param events: The list of Event objects.
+    :param session: The database session.
+
+    :returns: list of event ids (None for merged events).
+    """
+    return [orm_events.add_event(event=event, session=session) for event in events]
+
+
 @read_session
 def get_events(event_type, event_actual_id, status=None, session=None):
     """
@@ -13,8 +13,8 @@
 operations related to Transform.
 """
 
-import datetime
 import logging
+from collections import defaultdict
 
 # from idds.common import exceptions
 
@@ -28,6 +28,10 @@ from idds.orm import (transforms as orm_transforms,
                       processings as orm_processings)
 
 
+RELEASE_CONTENT_STATUS = frozenset([ContentStatus.Available, ContentStatus.FakeAvailable,
+                                    ContentStatus.FinalFailed, ContentStatus.Missing])
+
+
 @transactional_session
 def add_transform(request_id, workload_id, transform_type, transform_tag=None, priority=0, name=None,
                   status=TransformStatus.New, substatus=TransformStatus.New, locking=TransformLocking.Idle,
@@ -91,9 +95,8 @@ def get_transform(transform_id, request_id=None, to_json=False, session=None):
 def get_transform_by_id_status(transform_id, status=None, locking=False, session=None):
     tf = orm_transforms.get_transform_by_id_status(transform_id=transform_id, status=status, locking=locking, session=session)
     if tf is not None and locking:
-        parameters = {}
-        parameters['locking'] = TransformLocking.Locking
-        parameters['updated_at'] = datetime.datetime.utcnow()
+        # updated_at is set by orm update_transform
+        parameters = {'locking': TransformLocking.Locking}
         orm_transforms.update_transform(transform_id=tf['transform_id'], parameters=parameters, session=session)
     return tf
 
@@ -189,19 +192,33 @@ def get_transforms_by_status(status, period=None, locking=False, bulk_size=None,
                 if transform2s:
                     # reqs = req2s[:bulk_size]
                     # order requests
-                    transforms = []
-                    for tf_id in tf_ids:
-                        if len(transforms) >= bulk_size:
-                            break
-                        for tf in transform2s:
-                            if tf['transform_id'] == tf_id:
-                                transforms.append(tf)
-                                break
-                    # transforms = transforms[:bulk_size]
+                    transform2s_by_id = {tf['transform_id']: tf for tf in transform2s}
+                    transforms = [transform2s_by_id[tf_id] for tf_id in tf_ids if tf_id in transform2s_by_id][:bulk_size]
                 else:
                     transforms = []
             else:
                 transforms = []
+        elif only_return_id and bulk_size:
+            # only transform ids are selected. Select 2 * bulk_size ids with order by, then lock them
+            # with 'for update skip locked', so that rows already taken by other agents are skipped.
+            tf_ids = orm_transforms.get_transforms_by_status(status=status, period=period, locking=locking,
+                                                             bulk_size=bulk_size * 2, locking_for_update=False,
+                                                             to_json=False, only_return_id=True,
+                                                             min_request_id=min_request_id,
+                                                             new_poll=new_poll, update_poll=update_poll,
+                                                             by_substatus=by_substatus, session=session)
+            if tf_ids:
+                locked_tf_ids = orm_transforms.get_transforms_by_status(status=status, period=period, locking=locking,
+                                                                        bulk_size=None, locking_for_update=True,
+                                                                        to_json=False, only_return_id=True,
+                                                                        transform_ids=tf_ids,
+                                                                        min_request_id=min_request_id,
+                                                                        new_poll=new_poll, update_poll=update_poll,
+                                                                        by_substatus=by_substatus, session=session)
+                locked_tf_ids = set(locked_tf_ids)
+                transforms = [tf_id for tf_id in tf_ids if tf_id in locked_tf_ids][:bulk_size]
+            else:
+                transforms = []
         else:
             transforms = orm_transforms.get_transforms_by_status(status=status, period=period, locking=locking,
                                                                  locking_for_update=False,
@@ -216,13 +233,10 @@ def get_transforms_by_status(status, period=None, locking=False, bulk_size=None,
             parameters['locking'] = TransformLocking.Locking
         if next_poll_at:
             parameters['next_poll_at'] = next_poll_at
-        parameters['updated_at'] = datetime.datetime.utcnow()
-        if parameters:
-            for transform in transforms:
-                if type(transform) in [dict]:
-                    orm_transforms.update_transform(transform_id=transform['transform_id'], parameters=parameters, session=session)
-                else:
-                    orm_transforms.update_transform(transform_id=transform, parameters=parameters, session=session)
+        if transforms:
+            # the same values are set for all transforms, so update them in one statement
+            tf_ids = [transform['transform_id'] if type(transform) in [dict] else transform for transform in transforms]
+            orm_transforms.update_transforms_by_ids(transform_ids=tf_ids, parameters=parameters, session=session)
     else:
         transforms = orm_transforms.get_transforms_by_status(status=status, period=period, locking=locking,
                                                              bulk_size=bulk_size, to_json=to_json,
@@ -233,6 +247,29 @@ def get_transforms_by_status(status, period=None, locking=False, bulk_size=None,
     return transforms
 
 
+@transactional_session
+def get_transforms_by_status_groups(status_groups, locking=False, bulk_size=None, min_request_id=None,
+                                    not_lock=False, session=None):
+    """
+    Get ids of transforms for several groups of status in one transaction.
+
+    :param status_groups: dict of group name to {'status': <list of status>, 'new_poll': <bool>, 'update_poll': <bool>}.
+    :param locking: Whether to lock retrieved items.
+    :param bulk_size: Max number of transforms per group.
+    :param session: The database session in use.
+
+    :returns: dict of group name to list of transform ids.
+    """
+    rets = {}
+    for group_name, group in status_groups.items():
+        rets[group_name] = get_transforms_by_status(status=group['status'], locking=locking, bulk_size=bulk_size,
+                                                    new_poll=group.get('new_poll', False),
+                                                    update_poll=group.get('update_poll', False),
+                                                    only_return_id=True, min_request_id=min_request_id,
+                                                    not_lock=not_lock, session=session)
+    return rets
+
+
 @transactional_session
 def update_transform(transform_id, parameters, session=None):
     """
@@ -541,7 +578,7 @@ def release_inputs_by_collection_old(to_release_inputs):
 
 def release_inputs_by_collection(to_release_inputs, final=False):
     update_contents = []
-    status_to_check = [ContentStatus.Available, ContentStatus.FakeAvailable, ContentStatus.FinalFailed, ContentStatus.Missing]
+    status_to_check = RELEASE_CONTENT_STATUS
     for coll_id in to_release_inputs:
         to_release_contents = to_release_inputs[coll_id]
         if to_release_contents:
@@ -559,12 +596,10 @@ def release_inputs_by_collection(to_release_inputs, final=False):
                                                        name=None)
             # print("contents: %s" % str(contents))
 
-            unfinished_contents_dict = {}
+            unfinished_contents_dict = defaultdict(list)
             for content in contents:
                 if (content['content_relation_type'] == ContentRelationType.InputDependency):    # noqa: W503
                     if content['status'] not in status_to_check:
-                        if content['name'] not in unfinished_contents_dict:
-                            unfinished_contents_dict[content['name']] = []
                         content_short = {'content_id': content['content_id'], 'status': content['status']}
                         unfinished_contents_dict[content['name']].append(content_short)
 
@@ -587,7 +622,7 @@ def release_inputs_by_collection(to_release_inputs, final=False):
 
 def poll_inputs_dependency_by_collection(unfinished_inputs):
     update_contents = []
-    status_to_check = [ContentStatus.Available, ContentStatus.FakeAvailable, ContentStatus.FinalFailed, ContentStatus.Missing]
+    status_to_check = RELEASE_CONTENT_STATUS
     for coll_id in unfinished_inputs:
         unfinished_contents = unfinished_inputs[coll_id]
         contents = orm_contents.get_input_contents(request_id=unfinished_contents[0]['request_id'],
@@ -604,10 +639,8 @@ def poll_inputs_dependency_by_collection(unfinished_inputs):
                 elif content['substatus'] in status_to_check:
                     to_release_status[content['name']] = content['substatus']
 
-        unfinished_contents_dict = {}
+        unfinished_contents_dict = defaultdict(list)
         for content in unfinished_contents:
-            if content['name'] not in unfinished_contents_dict:
-                unfinished_contents_dict[content['name']] = []
             content_short = {'content_id': content['content_id'], 'status': content['status']}
             unfinished_contents_dict[content['name']].append(content_short)
 
@@ -263,7 +263,7 @@ def get_collections_by_status(status, relation_type=CollectionRelationType.Input
 
 @read_session
 def get_collections(scope=None, name=None, request_id=None, workload_id=None, transform_id=None,
-                    relation_type=None, to_json=False, session=None):
+                    relation_type=None, coll_id=None, to_json=False, session=None):
     """
     Get collections by request id or raise a NoObject exception.
 
@@ -273,6 +273,7 @@ def get_collections(scope=None, name=None, request_id=None, workload_id=None, tr
     :param workload_id: The workload id.
     :param transform_id: list of transform id related to this collection.
     :param relation_type: The relation type between this collection and the transform: Input, Ouput and Log.
+    :param coll_id: list of collection ids.
     :param to_json: return json format.
     :param session: The database session in use.
 
@@ -283,6 +284,8 @@ def get_collections(scope=None, name=None, request_id=None, workload_id=None, tr
     try:
         if transform_id and type(transform_id) not in (list, tuple):
             transform_id = [transform_id]
+        if coll_id and type(coll_id) not in (list, tuple):
+            coll_id = [coll_id]
 
         query = session.query(models.Collection)
         if scope:
@@ -297,6 +300,8 @@ def get_collections(scope=None, name=None, request_id=None, workload_id=None, tr
             query = query.filter(models.Collection.transform_id.in_(transform_id))
         if relation_type is not None:
             query = query.filter(models.Collection.relation_type == relation_type)
+        if coll_id:
+            query = query.filter(models.Collection.coll_id.in_(coll_id))
 
         query = query.order_by(asc(models.Collection.updated_at))
 
@@ -141,8 +141,11 @@ def add_contents(contents, bulk_size=10000, session=None):
 
     :returns: content id.
     """
+    # all contents get the same set of keys (sub_map_id and dep_sub_map_id are only set for sub maps),
+    # so that bulk_insert_mappings sends every chunk as one executemany instead of splitting it by key set.
     default_params = {'request_id': None, 'workload_id': None,
                       'transform_id': None, 'coll_id': None, 'map_id': None,
+                      'sub_map_id': 0, 'dep_sub_map_id': 0,
                       'scope': None, 'name': None, 'min_id': 0, 'max_id': 0,
                       'content_type': ContentType.File, 'status': ContentStatus.New,
                       'locking': ContentLocking.Idle, 'content_relation_type': ContentRelationType.Input,
@@ -153,11 +156,12 @@ def add_contents(contents, bulk_size=10000, session=None):
                       'content_metadata': None}
 
     for content in contents:
-        for key in default_params:
+        for key, value in default_params.items():
             if key not in content:
-                content[key] = default_params[key]
-        content['name_md5'] = hashlib.md5(content['name'].encode("utf-8")).hexdigest()
-        content['scope_name_md5'] = hashlib.md5(content['name'].encode("utf-8")).hexdigest()
+                content[key] = value
+        name_md5 = hashlib.md5(content['name'].encode("utf-8")).hexdigest()
+        content['name_md5'] = name_md5
+        content['scope_name_md5'] = name_md5
 
     sub_params = [contents[i:i + bulk_size] for i in range(0, len(contents), bulk_size)]
 
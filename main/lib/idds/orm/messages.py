@@ -53,7 +53,8 @@ def add_message(msg_type, status, source, request_id, workload_id, transform_id,
                 files = msg_content['files']
                 chunks = [files[i:i + bulk_size] for i in range(0, len(files), bulk_size)]
                 for chunk in chunks:
-                    new_msg_content = copy.deepcopy(msg_content)
+                    # shallow copy: only 'files' differs between chunks, so do not deep copy all files for every chunk
+                    new_msg_content = copy.copy(msg_content)
                     new_msg_content['files'] = chunk
                     new_num_contents = len(chunk)
                     num_contents_list.append(new_num_contents)
@@ -389,10 +389,12 @@ def get_transforms_by_status(status, period=None, transform_ids=[], locking=Fals
                 query = query.filter(models.Transform.substatus.in_(status))
             else:
                 query = query.filter(models.Transform.status.in_(status))
+        if new_poll or update_poll:
+            utc_now = datetime.datetime.utcnow()
         if new_poll:
-            query = query.filter(models.Transform.updated_at + models.Transform.new_poll_period <= datetime.datetime.utcnow())
+            query = query.filter(models.Transform.updated_at + models.Transform.new_poll_period <= utc_now)
         if update_poll:
-            query = query.filter(models.Transform.updated_at + models.Transform.update_poll_period <= datetime.datetime.utcnow())
+            query = query.filter(models.Transform.updated_at + models.Transform.update_poll_period <= utc_now)
 
         if transform_ids:
             query = query.filter(models.Transform.transform_id.in_(transform_ids))
@@ -444,7 +446,8 @@ def update_transform(transform_id, parameters, session=None):
 
     """
     try:
-        parameters['updated_at'] = datetime.datetime.utcnow()
+        utc_now = datetime.datetime.utcnow()
+        parameters['updated_at'] = utc_now
 
         if 'new_poll_period' in parameters and type(parameters['new_poll_period']) not in [datetime.timedelta]:
             parameters['new_poll_period'] = datetime.timedelta(seconds=parameters['new_poll_period'])
@@ -453,7 +456,7 @@ def update_transform(transform_id, parameters, session=None):
 
         if 'status' in parameters and parameters['status'] in [TransformStatus.Finished, TransformStatus.Finished.value,
                                                                TransformStatus.Failed, TransformStatus.Failed.value]:
-            parameters['finished_at'] = datetime.datetime.utcnow()
+            parameters['finished_at'] = utc_now
 
         if 'transform_metadata' in parameters and 'work' in parameters['transform_metadata']:
             work = parameters['transform_metadata']['work']
@@ -475,6 +478,32 @@ def update_transform(transform_id, parameters, session=None):
         raise exceptions.NoObject('Transfrom %s cannot be found: %s' % (transform_id, error))
 
 
+@transactional_session
+def update_transforms_by_ids(transform_ids, parameters, session=None):
+    """
+    update transforms with the same parameters, in one statement per chunk of ids.
+
+    Only plain column values are supported (no work or metadata handling as in update_transform).
+
+    :param transform_ids: list of transform ids.
+    :param parameters: A dictionary of parameters.
+    :param session: The database session in use.
+
+    :raises DatabaseException: If there is a database error.
+    """
+    try:
+        parameters['updated_at'] = datetime.datetime.utcnow()
+        # Oracle supports at most 1000 items in an IN list
+        for i in range(0, len(transform_ids), 1000):
+            chunk = transform_ids[i:i + 1000]
+            if len(chunk) == 1:
+                chunk = [chunk[0], chunk[0]]
+            session.query(models.Transform).filter(models.Transform.transform_id.in_(chunk))\
+                   .update(parameters, synchronize_session=False)
+    except DatabaseError as error:
+        raise exceptions.DatabaseException(error)
+
+
 @transactional_session
 def delete_transform(transform_id=None, session=None):
     """
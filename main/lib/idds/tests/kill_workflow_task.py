@@ -19,23 +19,39 @@ import pandaclient.idds_api                                          # noqa E402
 
 
 parser = argparse.ArgumentParser()
-parser.add_argument('--workflow_id', dest='workflow_id', action='store', help='Workflow to kill', required=True)
-parser.add_argument('--task_id', dest='task_id', action='store', help='Task to kill', required=False)
+parser.add_argument('--workflow_id', dest='workflow_id', action='store', nargs='+', help='Workflows to kill', required=True)
+parser.add_argument('--task_id', dest='task_id', action='store', nargs='+', help='Tasks to kill', required=False)
 
 
-def kill_workflow_task(idds_server, request_id, task_id=None):
+def get_request_task_pairs(request_ids, task_ids=None):
+    if not task_ids:
+        return [(request_id, None) for request_id in request_ids]
+    if len(request_ids) == 1:
+        return [(request_ids[0], task_id) for task_id in task_ids]
+    if len(request_ids) != len(task_ids):
+        raise ValueError("--workflow_id and --task_id must have the same number of values (or a single workflow_id)")
+    return list(zip(request_ids, task_ids))
+
+
+def kill_workflow_tasks(idds_server, pairs):
+    # one client (and connection) for all the pairs
     c = pandaclient.idds_api.get_api(idds_utils.json_dumps,
                                      idds_host=idds_server, compress=True, manager=True)
-    if task_id is None:
-        ret = c.abort(request_id=request_id)
-    else:
-        ret = c.abort_tasks(request_id=request_id, task_id=task_id)
+    for request_id, task_id in pairs:
+        if task_id is None:
+            ret = c.abort(request_id=request_id)
+        else:
+            ret = c.abort_tasks(request_id=request_id, task_id=task_id)
 
-    print("Command is sent to iDDS: ", str(ret))
+        print("Command is sent to iDDS (request_id: %s, task_id: %s): %s" % (request_id, task_id, str(ret)))
+
+
+def kill_workflow_task(idds_server, request_id, task_id=None):
+    kill_workflow_tasks(idds_server, [(request_id, task_id)])
 
 
 if __name__ == '__main__':
     host = "https://aipanda015.cern.ch:443/idds"
 
     args = parser.parse_args()
-    kill_workflow_task(host, args.workflow_id, args.task_id)
+    kill_workflow_tasks(host, get_request_task_pairs(args.workflow_id, args.task_id))
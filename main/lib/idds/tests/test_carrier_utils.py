@@ -0,0 +1,67 @@
+#!/usr/bin/env python
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# You may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+# http://www.apache.org/licenses/LICENSE-2.0OA
+#
+# Authors:
+# - Wen Guan, <wen.guan@cern.ch>, 2024
+
+
+"""
+Test carrier content status helpers.
+"""
+
+import unittest2 as unittest
+
+from idds.common.constants import ContentStatus
+from idds.common.utils import setup_logging
+from idds.agents.carrier.utils import (AVAILABLE_CONTENT_STATUS, TERMINATED_CONTENT_STATUS,
+                                       TERMINATED_CONTENT_STATUS_WITH_FAILED,
+                                       is_all_contents_available, is_all_contents_terminated,
+                                       is_all_contents_terminated_but_not_available,
+                                       get_contents_terminated_status)
+
+
+setup_logging(__name__)
+
+
+class TestCarrierUtils(unittest.TestCase):
+
+    def test_content_status_table(self):
+        self.assertEqual(AVAILABLE_CONTENT_STATUS, set([ContentStatus.Available, ContentStatus.FakeAvailable]))
+        self.assertEqual(TERMINATED_CONTENT_STATUS, set([ContentStatus.Available, ContentStatus.FakeAvailable,
+                                                         ContentStatus.FinalFailed, ContentStatus.Missing]))
+        self.assertEqual(TERMINATED_CONTENT_STATUS_WITH_FAILED, TERMINATED_CONTENT_STATUS | set([ContentStatus.Failed]))
+
+    def test_get_contents_terminated_status(self):
+        # (substatus list, terminated, expected status)
+        cases = [([], False, ContentStatus.Available),
+                 ([ContentStatus.Available], False, ContentStatus.Available),
+                 ([ContentStatus.Available, ContentStatus.FakeAvailable], False, ContentStatus.Available),
+                 ([ContentStatus.Available, ContentStatus.Missing], False, ContentStatus.Missing),
+                 ([ContentStatus.FinalFailed], False, ContentStatus.Missing),
+                 ([ContentStatus.Available, ContentStatus.New], False, None),
+                 ([ContentStatus.Missing, ContentStatus.Processing], False, None),
+                 ([ContentStatus.Failed], False, None),
+                 ([ContentStatus.Failed], True, ContentStatus.Missing),
+                 ([ContentStatus.Available, ContentStatus.Failed], True, ContentStatus.Missing),
+                 ([ContentStatus.New, ContentStatus.Failed], True, None)]
+        for substatus_list, terminated, expected in cases:
+            dict_contents = [{'content_id': i, 'substatus': substatus} for i, substatus in enumerate(substatus_list)]
+            list_contents = [[i, substatus] for i, substatus in enumerate(substatus_list)]
+            for contents in (dict_contents, list_contents):
+                ret = get_contents_terminated_status(contents, terminated)
+                self.assertEqual(ret, expected, "%s, terminated=%s" % (substatus_list, terminated))
+
+                # consistent with the single purpose helpers
+                self.assertEqual(ret == ContentStatus.Available, is_all_contents_available(contents))
+                self.assertEqual(ret is not None, is_all_contents_terminated(contents, terminated))
+                if ContentStatus.FakeAvailable not in substatus_list:
+                    self.assertEqual(ret == ContentStatus.Missing,
+                                     is_all_contents_terminated_but_not_available(contents, terminated))
+
+
+if __name__ == '__main__':
+    unittest.main()
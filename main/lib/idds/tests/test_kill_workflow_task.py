@@ -0,0 +1,45 @@
+#!/usr/bin/env python
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# You may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+# http://www.apache.org/licenses/LICENSE-2.0OA
+#
+# Authors:
+# - Wen Guan, <wen.guan@cern.ch>, 2024
+
+
+"""
+Test kill_workflow_task arguments.
+"""
+
+import unittest2 as unittest
+
+from idds.tests.kill_workflow_task import parser, get_request_task_pairs
+
+
+class TestKillWorkflowTask(unittest.TestCase):
+
+    def test_request_only(self):
+        self.assertEqual(get_request_task_pairs(['1']), [('1', None)])
+        self.assertEqual(get_request_task_pairs(['1', '2'], None), [('1', None), ('2', None)])
+
+        args = parser.parse_args(['--workflow_id', '1', '2'])
+        self.assertEqual(get_request_task_pairs(args.workflow_id, args.task_id), [('1', None), ('2', None)])
+
+    def test_one_request_many_tasks(self):
+        args = parser.parse_args(['--workflow_id', '1', '--task_id', '10', '11'])
+        self.assertEqual(get_request_task_pairs(args.workflow_id, args.task_id), [('1', '10'), ('1', '11')])
+
+    def test_request_task_pairs(self):
+        self.assertEqual(get_request_task_pairs(['1', '2'], ['10', '20']), [('1', '10'), ('2', '20')])
+
+    def test_mismatched_count(self):
+        with self.assertRaises(ValueError):
+            get_request_task_pairs(['1', '2'], ['10', '20', '30'])
+        with self.assertRaises(ValueError):
+            get_request_task_pairs(['1', '2', '3'], ['10', '20'])
+
+
+if __name__ == '__main__':
+    unittest.main()
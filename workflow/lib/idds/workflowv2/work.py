@@ -1301,6 +1301,37 @@ class Work(Base):
         self.parameters_for_next_task = None
         self.last_updated_at = datetime.datetime.utcnow()
 
+    def clone_for_processing(self):
+        """
+        Clone the work to be attached to a new processing.
+
+        It's the same as copy.deepcopy() followed by clean_work(), but the processings,
+        outputs and messages which clean_work() drops are detached before copying, so they
+        are not deep copied just to be thrown away. The work_name_to_coll_map is read only
+        and shared with the clone instead of being copied.
+        """
+        metadata_items = vars(self.metadata)
+        detached_items = {}
+        for key in ['processings', 'active_processings', 'cancelled_processings',
+                    'suspended_processings', 'old_processings', 'output_data']:
+            if key in metadata_items:
+                detached_items[key] = metadata_items.pop(key)
+        processings = self._processings
+        self._processings = {}
+        terminated_msg, parameters_for_next_task = self.terminated_msg, self.parameters_for_next_task
+        self.terminated_msg, self.parameters_for_next_task = "", None
+        memo = {}
+        if self.work_name_to_coll_map:
+            memo[id(self.work_name_to_coll_map)] = self.work_name_to_coll_map
+        try:
+            new_work = copy.deepcopy(self, memo)
+        finally:
+            self._processings = processings
+            self.terminated_msg, self.parameters_for_next_task = terminated_msg, parameters_for_next_task
+            metadata_items.update(detached_items)
+        new_work.clean_work()
+        return new_work
+
     def set_agent_attributes(self, attrs, req_attributes=None):
         if self.agent_attributes is None:
             self.agent_attributes = {}